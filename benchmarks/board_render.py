@@ -0,0 +1,65 @@
+import base64
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+import board
+
+# ----------------------------------------------------------------------------------------------------------------
+# Porównanie: st.pyplot (matplotlib -> PNG) vs lekka plansza SVG
+# python benchmarks/board_render.py [liczba_pozycji]
+# ----------------------------------------------------------------------------------------------------------------
+
+def pyplot_score(answer_slider, guess_slider):
+    # To samo co dawne draw_score + st.pyplot: nowa figura pyplot przy każdym rerunie
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.set_aspect('equal')
+    ax.axis('off')
+    theta_bg = np.linspace(0, 180, 300)
+    ax.fill(np.append(np.cos(np.deg2rad(theta_bg)), 0), np.append(np.sin(np.deg2rad(theta_bg)), 0), color=board.colors["tlo"])
+    board.draw_segments(ax, board.answer_angle(answer_slider))
+    board.draw_ray(ax, board.guess_angle(guess_slider), 1)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **board.SAVEFIG_OPTIONS)
+    plt.close(fig)
+    return buffer.getvalue()
+
+def measure(render, positions):
+    times = []
+    sizes = []
+    for answer_slider, guess_slider in positions:
+        start = time.perf_counter()
+        payload = render(answer_slider, guess_slider)
+        times.append(time.perf_counter() - start)
+        if isinstance(payload, str):
+            # st.image wysyła SVG jako data URL w base64
+            payload = base64.b64encode(payload.encode("utf-8"))
+        sizes.append(len(payload))
+    return times, sizes
+
+def report(name, times, sizes):
+    times_ms = sorted(t * 1000 for t in times)
+    p95 = times_ms[int(len(times_ms) * 0.95) - 1] if len(times_ms) > 1 else times_ms[0]
+    print(f"{name:<22} mediana {statistics.median(times_ms):8.3f} ms | p95 {p95:8.3f} ms | "
+          f"payload śr. {statistics.mean(sizes) / 1024:7.1f} KiB")
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    step = max(1, 200 // count)
+    positions = [(s, -s) for s in range(-100, 101, step)][:count]
+
+    report("st.pyplot (stare)", *measure(pyplot_score, positions))
+    report("PNG cache - miss", *measure(board._score_png.__wrapped__, positions))
+    measure(board.score_png, positions)
+    report("PNG cache - hit", *measure(board.score_png, positions))
+    board.arc_tables()
+    report("SVG", *measure(board.score_svg, positions))
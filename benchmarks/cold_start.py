@@ -0,0 +1,51 @@
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------------------------------------------------------------------------------------------------
+# Zimny start banku pytań - każdy pomiar w świeżym interpreterze (import + wczytanie)
+# python benchmarks/cold_start.py [powtórzenia]
+# ----------------------------------------------------------------------------------------------------------------
+
+VARIANTS = {
+    # Dawna ścieżka: pandas.read_csv + to_dict
+    "pandas.read_csv": (
+        "import pandas as pd\n"
+        "from question_bank import CATEGORY_NAMES, QuestionBank\n"
+        "QuestionBank(pd.read_csv('questions.csv', sep=';').to_dict(orient='records'), CATEGORY_NAMES)\n"
+    ),
+    "csv": (
+        "from question_bank import CATEGORY_NAMES, load_question_bank\n"
+        "load_question_bank('questions.csv', CATEGORY_NAMES)\n"
+    ),
+    "questions.bin": (
+        "from question_bank import CATEGORY_NAMES, load_artifact\n"
+        "load_artifact('questions.bin', CATEGORY_NAMES, 'questions.csv')\n"
+    ),
+}
+
+TIMED = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "{code}"
+    "print((time.perf_counter() - start) * 1000)\n"
+)
+
+def run(code):
+    result = subprocess.run(
+        [sys.executable, "-c", TIMED.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    if not os.path.exists(os.path.join(ROOT, "questions.bin")):
+        sys.exit("Brak questions.bin - python question_bank.py questions.csv questions.bin")
+    for name, code in VARIANTS.items():
+        run(code)   # rozgrzanie cache systemu plików / .pyc
+        times = [run(code) for _ in range(repeats)]
+        print(f"{name:16} mediana {statistics.median(times):7.1f} ms | min {min(times):7.1f} ms")
@@ -0,0 +1,273 @@
+import base64
+import hashlib
+import json
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----------------------------------------------------------------------------------------------------------------
+# Lokalna atrapa API GitHuba (contents + git data: refs/commits/trees/blobs) do testów offline i benchmarków
+#
+#   python benchmarks/fake_github.py 8765
+#   GITHUB_API_URL=http://127.0.0.1:8765 streamlit run streamlit_app.py
+# ----------------------------------------------------------------------------------------------------------------
+
+def blob_sha(content):
+    # Ten sam skrót co git: sha1("blob <rozmiar>\0" + treść)
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def object_sha(kind, body):
+    return hashlib.sha1(kind.encode("utf-8") + json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FakeGitHub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blobs = {}          # sha -> bytes
+        self.trees = {}          # sha -> {ścieżka: sha bloba}
+        self.commits = {}        # sha -> {"tree", "parents", "message"}
+        self.requests = 0
+        self.connections = 0
+        self.delay = 0.0         # sztuczne opóźnienie odpowiedzi (load test)
+        self.fail_next = 0       # ile kolejnych zapytań zwróci 503
+        self.head = self.commit({}, [], "init")
+
+    # --- obiekty git (wywoływane pod self.lock) ---
+
+    def tree(self, files):
+        sha = object_sha("tree", files)
+        self.trees[sha] = dict(files)
+        return sha
+
+    def commit(self, files, parents, message):
+        body = {"tree": self.tree(files), "parents": parents, "message": message}
+        sha = object_sha("commit", body)
+        self.commits[sha] = body
+        return sha
+
+    @property
+    def files(self):
+        tree = self.trees[self.commits[self.head]["tree"]]
+        return {path: self.blobs[sha] for path, sha in tree.items()}
+
+    def add_file(self, path, content):
+        with self.lock:
+            sha = blob_sha(content)
+            self.blobs[sha] = content
+            files = dict(self.trees[self.commits[self.head]["tree"]])
+            files[path] = sha
+            self.head = self.commit(files, [self.head], f"add {path}")
+
+    def listing(self, sha):
+        # Wpisy jednego poziomu drzewa jak w GET git/trees/<sha>; podkatalogi dostają własne drzewa
+        entries, folders = [], {}
+        for path, blob in sorted(self.trees[sha].items()):
+            folder, _, rest = path.partition("/")
+            if rest:
+                folders.setdefault(folder, {})[rest] = blob
+            else:
+                entries.append({"path": path, "mode": "100644", "type": "blob", "sha": blob,
+                                "size": len(self.blobs[blob])})
+        for folder, files in folders.items():
+            entries.append({"path": folder, "mode": "040000", "type": "tree", "sha": self.tree(files)})
+        return sorted(entries, key=lambda e: e["path"])
+
+    def entry(self, path, sha):
+        return {
+            "name": path.rsplit("/", 1)[-1],
+            "path": path,
+            "sha": sha,
+            "size": len(self.blobs[sha]),
+            "type": "file",
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    server_version = "FakeGitHub/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Nagłówki i treść idą osobnymi zapisami - bez NODELAY keep-alive czekałby na opóźniony ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.github.lock:
+            self.server.github.connections += 1
+
+    @property
+    def github(self):
+        return self.server.github
+
+    def send_json(self, code, body, headers=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def route(self):
+        with self.github.lock:
+            self.github.requests += 1
+            failing = self.github.fail_next > 0
+            if failing:
+                self.github.fail_next -= 1
+        if self.github.delay:
+            threading.Event().wait(self.github.delay)
+        if failing:
+            self.read_json()
+            self.send_json(503, {"message": "Service Unavailable"})
+            return None, None
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        # repos/<owner>/<repo>/<rodzaj>/<reszta...>
+        if len(parts) < 4 or parts[0] != "repos":
+            self.send_json(404, {"message": "Not Found"})
+            return None, None
+        return parts[3], "/".join(parts[4:])
+
+    # --- contents ---
+
+    def do_GET(self):
+        kind, path = self.route()
+        if kind == "contents":
+            return self.get_contents(path)
+        if kind == "git":
+            return self.get_git(path)
+        if kind is not None:
+            self.send_json(404, {"message": "Not Found"})
+
+    def get_contents(self, path):
+        with self.github.lock:
+            tree = self.github.trees[self.github.commits[self.github.head]["tree"]]
+            if path in tree:
+                body = self.github.entry(path, tree[path])
+                body["content"] = base64.b64encode(self.github.blobs[tree[path]]).decode("ascii")
+            else:
+                prefix = path.rstrip("/") + "/"
+                body = [
+                    self.github.entry(p, sha) for p, sha in sorted(tree.items())
+                    if p.startswith(prefix) and "/" not in p[len(prefix):]
+                ] or None
+        if body is None:
+            return self.send_json(404, {"message": "Not Found"})
+        etag = '"%s"' % hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self.send_json(304, None, {"ETag": etag})
+        self.send_json(200, body, {"ETag": etag})
+
+    def do_PUT(self):
+        kind, path = self.route()
+        if kind is None:
+            return
+        if kind != "contents":
+            return self.send_json(404, {"message": "Not Found"})
+        data = self.read_json()
+        content = base64.b64decode(data.get("content", ""))
+        with self.github.lock:
+            files = dict(self.github.trees[self.github.commits[self.github.head]["tree"]])
+            if path in files:
+                if data.get("sha") != files[path]:
+                    return self.send_json(422, {"message": "Invalid request.\n\n\"sha\" wasn't supplied."})
+                code = 200
+            else:
+                code = 201
+            sha = blob_sha(content)
+            self.github.blobs[sha] = content
+            files[path] = sha
+            self.github.head = self.github.commit(files, [self.github.head], data.get("message", ""))
+            entry = self.github.entry(path, sha)
+        self.send_json(code, {"content": entry})
+
+    # --- git data ---
+
+    def get_git(self, path):
+        with self.github.lock:
+            if path == "ref/heads/main":
+                body = {"ref": "refs/heads/main", "object": {"sha": self.github.head, "type": "commit"}}
+            elif path.startswith("commits/") and path[8:] in self.github.commits:
+                commit = self.github.commits[path[8:]]
+                body = {"sha": path[8:], "tree": {"sha": commit["tree"]}, "message": commit["message"],
+                        "parents": [{"sha": p} for p in commit["parents"]]}
+            elif path.startswith("trees/") and path[6:] in self.github.trees:
+                body = {"sha": path[6:], "tree": self.github.listing(path[6:]), "truncated": False}
+            else:
+                body = None
+        if body is None:
+            return self.send_json(404, {"message": "Not Found"})
+        self.send_json(200, body)
+
+    def do_POST(self):
+        kind, path = self.route()
+        if kind is None:
+            return
+        data = self.read_json()
+        if kind != "git":
+            return self.send_json(404, {"message": "Not Found"})
+        with self.github.lock:
+            if path == "blobs":
+                content = base64.b64decode(data["content"])
+                sha = blob_sha(content)
+                self.github.blobs[sha] = content
+                return self.send_json(201, {"sha": sha})
+            if path == "trees":
+                base = self.github.trees.get(data.get("base_tree"), {})
+                files = dict(base)
+                for item in data["tree"]:
+                    if item["sha"] not in self.github.blobs:
+                        return self.send_json(422, {"message": "Invalid tree info"})
+                    files[item["path"]] = item["sha"]
+                return self.send_json(201, {"sha": self.github.tree(files)})
+            if path == "commits":
+                if data["tree"] not in self.github.trees:
+                    return self.send_json(422, {"message": "Tree SHA does not exist"})
+                body = {"tree": data["tree"], "parents": data["parents"], "message": data["message"]}
+                sha = object_sha("commit", body)
+                self.github.commits[sha] = body
+                return self.send_json(201, {"sha": sha})
+        self.send_json(404, {"message": "Not Found"})
+
+    def do_PATCH(self):
+        kind, path = self.route()
+        if kind is None:
+            return
+        data = self.read_json()
+        if kind != "git" or path != "refs/heads/main":
+            return self.send_json(404, {"message": "Not Found"})
+        with self.github.lock:
+            commit = self.github.commits.get(data["sha"])
+            if commit is None:
+                return self.send_json(422, {"message": "Object does not exist"})
+            # Bez force tylko fast-forward
+            if not data.get("force") and self.github.head not in commit["parents"]:
+                return self.send_json(422, {"message": "Update is not a fast forward"})
+            self.github.head = data["sha"]
+        self.send_json(200, {"ref": "refs/heads/main", "object": {"sha": data["sha"]}})
+
+
+def start(port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.github = FakeGitHub()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    server = start(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Atrapa GitHub API: {url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
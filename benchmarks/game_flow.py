@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Kolejka wyników, licznik gier, checkpointy i dziennik gier w katalogu tymczasowym - benchmark nie zostawia plików w repo
+_workdir = tempfile.mkdtemp(prefix="spectrum-bench-")
+os.environ.setdefault("SPECTRUM_OUTBOX_DIR", os.path.join(_workdir, "outbox"))
+os.environ.setdefault("SPECTRUM_COUNTER_FILE", os.path.join(_workdir, "counter.json"))
+os.environ.setdefault("GITHUB_CACHE_DIR", os.path.join(_workdir, "cache"))
+os.environ.setdefault("SPECTRUM_SESSION_DIR", os.path.join(_workdir, "sesje"))
+os.environ.setdefault("SPECTRUM_JOURNAL_DB", os.path.join(_workdir, "gry.db"))
+os.environ["SPECTRUM_SEED_PARAM"] = "1"     # aplikacja czyta ?seed= tylko z tą flagą
+
+import logging
+logging.disable(logging.WARNING)   # "missing ScriptRunContext" z AppTest
+
+from streamlit.testing.v1 import AppTest
+
+import results_export
+
+# ----------------------------------------------------------------------------------------------------------------
+# Rozgrywki skryptowe bez przeglądarki (AppTest): każdy tryb, plansza fizyczna i wirtualna, N rund.
+# Losowanie pytań z ziarnem (?seed=), więc wyniki są porównywalne między commitami.
+#
+#   python benchmarks/game_flow.py --rounds 3 --seed 1 [--json wynik.json] [--detail]
+# ----------------------------------------------------------------------------------------------------------------
+
+APP = os.path.join(ROOT, "streamlit_app.py")
+MODES = ("2-osobowy", "3-osobowy", "Drużynowy")
+CATEGORIES = ("Śmieszne", "Luźne", "Wolisz")
+PLAYERS = ("Ala", "Bartek", "Celina", "Darek")
+TIMEOUT = 60
+
+
+class GameError(Exception):
+    pass
+
+
+class Table:
+    # Jeden stolik = jedna sesja AppTest; każda interakcja mierzona osobno
+    def __init__(self, seed=0, token=None, svg=False):
+        # Aplikacja czyta questions.csv/questions.bin względem katalogu roboczego - benchmark działa z dowolnego
+        os.chdir(ROOT)
+        self.at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+        self.at.query_params["seed"] = str(seed)
+        if token:
+            self.at.secrets["GITHUB_TOKEN"] = token
+        self.svg = svg
+        self.timings = []    # (etykieta, ms)
+
+    def step(self, label, action=None):
+        start = time.perf_counter()
+        if action is not None:
+            action()
+        self.at.run()
+        self.timings.append((label, (time.perf_counter() - start) * 1000))
+        if self.at.exception:
+            raise GameError(f"{label}: {[e.value for e in self.at.exception]}")
+
+    def button(self, label, exact=False):
+        for b in self.at.button:
+            if (b.label == label) if exact else (label in b.label):
+                return b
+        raise GameError(f"brak przycisku {label!r}: {[b.label for b in self.at.button]}")
+
+    def has_button(self, label):
+        return any(label in b.label for b in self.at.button)
+
+    def click(self, label, exact=False, name=None):
+        self.step(name or label, self.button(label, exact).click)
+
+    def play(self, mode, virtual, rounds):
+        self.step("start")
+        if virtual:
+            self.step("virtual_board", self.at.checkbox[0].check)
+            if self.svg:
+                self.step("svg_board", self.at.checkbox[1].check)
+        self.click(mode, exact=True, name="mode")
+
+        if mode == "Drużynowy":
+            for i, name in enumerate(PLAYERS):
+                self.step("player_name", lambda: self.at.text_input[2 + i].input(name))
+        else:
+            for i in range(2 if mode == "2-osobowy" else 3):
+                self.step("player_name", lambda: self.at.text_input[i].input(PLAYERS[i]))
+        self.click("Dalej", name="setup_next")
+        for cat in CATEGORIES:
+            self.click(cat, name="category")
+        self.click("Rozpocznij", name="start_game")
+
+        played = 0
+        while True:
+            self.question(mode, virtual)
+            if self.has_button("Tak, kontynuuj"):
+                played += 1
+                if played >= rounds:
+                    break
+                self.click("Tak, kontynuuj", name="continue")
+        self.click("Zakończ", name="finish")
+        return self
+
+    def question(self, mode, virtual):
+        if virtual:
+            self.step("answer_slider", lambda: self.at.slider[0].set_value(10))
+            self.click("Zatwierdź odpowiedź", name="confirm_answer")
+            self.step("guess_slider", lambda: self.at.slider[0].set_value(5))
+            self.click("Zatwierdź punktację", name="confirm_guess")
+            if mode != "2-osobowy":
+                self.click("Lewo", name="direction")
+                self.click("Zatwierdź kierunek", name="confirm_direction")
+            self.click("Następne pytanie", name="next_question")
+        else:
+            self.click("3", exact=True, name="guesser_points")
+            if mode != "2-osobowy":
+                self.click("1", exact=True, name="extra_point")
+            self.click("Zapisz i dalej", name="save_question")
+
+    @property
+    def state(self):
+        return self.at.session_state
+
+    def result(self):
+        log = self.state["round_log"] if "round_log" in self.state else None
+        return {
+            "questions": self.state["questions_asked"],
+            "reruns": self.state["run_stats"]["total"],
+            "export_bytes": {
+                fmt: len(results_export.export(log.events(), fmt)) for fmt in results_export.FORMATS
+            } if log is not None else {},
+        }
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_scenario(mode, virtual, rounds, seed, svg=False, memory=True):
+    table = Table(seed, svg=svg).play(mode, virtual, rounds)
+    times = [ms for _, ms in table.timings]
+    result = {
+        "mode": mode,
+        "board": ("svg" if svg else "png") if virtual else "fizyczna",
+        "interactions": len(times),
+        "p50_ms": statistics.median(times),
+        "p95_ms": percentile(times, 95),
+        "max_ms": max(times),
+        **table.result(),
+        "per_label": {
+            label: statistics.median(ms for l, ms in table.timings if l == label)
+            for label in dict.fromkeys(l for l, _ in table.timings)
+        },
+    }
+    if memory:
+        # Osobny przebieg pod tracemalloc (spowalnia), żeby nie zaburzać czasów
+        tracemalloc.start()
+        Table(seed, svg=svg).play(mode, virtual, rounds)
+        result["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Rozgrywki skryptowe bez przeglądarki")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--svg", action="store_true", help="wirtualna plansza jako SVG zamiast PNG")
+    parser.add_argument("--no-memory", action="store_true", help="bez przebiegu tracemalloc")
+    parser.add_argument("--detail", action="store_true", help="mediana per rodzaj interakcji")
+    parser.add_argument("--json", help="zapis wyników do pliku")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)     # przed zmianą katalogu roboczego w Table
+
+    results = []
+    for mode in args.modes:
+        for virtual in (False, True):
+            r = run_scenario(mode, virtual, args.rounds, args.seed, args.svg, not args.no_memory)
+            results.append(r)
+            peak = f"{r['peak_mib']:6.1f} MiB" if "peak_mib" in r else "      -"
+            print(
+                f"{r['mode']:10} {r['board']:8} pytań {r['questions']:3} | interakcji {r['interactions']:4} | "
+                f"p50 {r['p50_ms']:7.1f} ms  p95 {r['p95_ms']:7.1f} ms  max {r['max_ms']:7.1f} ms | "
+                f"reruny {r['reruns']:4} | szczyt {peak} | xlsx {r['export_bytes'].get('xlsx', 0):6} B"
+            )
+            if args.detail:
+                for label, ms in r["per_label"].items():
+                    print(f"    {label:20} {ms:7.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rounds": args.rounds, "seed": args.seed, "results": results}, f, ensure_ascii=False, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+import fake_github
+from github_client import GitHubClient
+
+# ----------------------------------------------------------------------------------------------------------------
+# Gołe requests.get/put vs wspólny klient z pulą połączeń, na lokalnej atrapie API
+# python benchmarks/http_client.py [liczba_zapytań]
+# ----------------------------------------------------------------------------------------------------------------
+
+REPO = "DawidS25/Spectrum"
+
+def timed(call, count):
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = fake_github.start()
+    base_url = fake_github.url(server)
+    server.github.add_file("wyniki/2025-08-11_gra001.xlsx", b"x")
+
+    listing = f"{base_url}/repos/{REPO}/contents/wyniki"
+    before = server.github.connections
+    bare = timed(lambda: requests.get(listing, timeout=5), count)
+    bare_connections = server.github.connections - before
+
+    client = GitHubClient(base_url)
+    before = server.github.connections
+    pooled = timed(lambda: client.get(f"/repos/{REPO}/contents/wyniki"), count)
+    pooled_connections = server.github.connections - before
+
+    print(f"requests.get   mediana {statistics.median(bare):6.2f} ms | połączeń: {bare_connections}")
+    print(f"GitHubClient   mediana {statistics.median(pooled):6.2f} ms | połączeń: {pooled_connections}")
+    print("statystyki klienta:", client.stats())
+    server.shutdown()
@@ -0,0 +1,44 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------------------------------------------------------------------------------------------------
+# Czas startu: import streamlit + pierwsze wykonanie streamlit_app.py (ekran wyboru trybu),
+# każdy pomiar w świeżym interpreterze. Pokazuje też, które ciężkie biblioteki zostały załadowane.
+# python benchmarks/import_time.py [powtórzenia]
+# ----------------------------------------------------------------------------------------------------------------
+
+HEAVY = ["pandas", "numpy", "matplotlib", "requests", "xlsxwriter", "pyarrow"]
+
+SCRIPT = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)   # "missing ScriptRunContext" w trybie bez serwera
+start = time.perf_counter()
+import streamlit
+streamlit_ms = (time.perf_counter() - start) * 1000
+import streamlit_app
+total_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "streamlit_ms": streamlit_ms,
+    "app_ms": total_ms - streamlit_ms,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+def run():
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run()   # rozgrzanie .pyc
+    runs = [run() for _ in range(repeats)]
+    print(f"import streamlit        mediana {statistics.median(r['streamlit_ms'] for r in runs):7.1f} ms")
+    print(f"streamlit_app (1. run)  mediana {statistics.median(r['app_ms'] for r in runs):7.1f} ms")
+    print("załadowane ciężkie moduły:", ", ".join(runs[-1]["loaded"]) or "brak")
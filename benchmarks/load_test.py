@@ -0,0 +1,276 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_github
+import game_flow
+import streamlit_client
+
+# ----------------------------------------------------------------------------------------------------------------
+# Load test: jeden serwer `streamlit run streamlit_app.py` i N stolików naraz - każdy to osobne połączenie
+# websocket, jak karta przeglądarki. Pełna ścieżka mode_select -> end i upload na lokalną atrapę API.
+# Wszystkie sesje dzielą jeden proces: cache banku, LRU planszy, pulę wysyłki (MAX_WORKERS), limit
+# kolejki (MAX_PENDING) i GIL - tak jak na produkcji.
+# Raportuje przepustowość, ogony opóźnień per interakcja (od wysłania do końca reruna), RSS serwera w czasie,
+# outbox oraz queue_stats() i rejestr stolików serwera (odczytane z panelu ?debug=1 osobnej sesji-obserwatora).
+#
+#   python benchmarks/load_test.py --tables 12 --games 2 --rounds 1 --api-delay 0.1
+# ----------------------------------------------------------------------------------------------------------------
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+APP = os.path.join(ROOT, "streamlit_app.py")
+START_TIMEOUT = 60
+UPLOAD_TIMEOUT = 120
+
+
+def rss_mib(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 2 ** 20
+    except OSError:   # proces już się zakończył albo poza Linuksem
+        return 0.0
+
+def peak_rss_mib(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    # Serwer aplikacji w osobnym procesie; katalog roboczy = repo (questions.csv), pliki gry w workdir
+    def __init__(self, workdir, api_url):
+        self.port = free_port()
+        secrets = os.path.join(workdir, "secrets.toml")
+        with open(secrets, "w", encoding="utf-8") as f:
+            f.write('GITHUB_TOKEN = "bench"\n')
+        env = dict(
+            os.environ,
+            GITHUB_API_URL=api_url,
+            GITHUB_CACHE_DIR=os.path.join(workdir, "cache"),
+            SPECTRUM_OUTBOX_DIR=os.path.join(workdir, "outbox"),
+            SPECTRUM_COUNTER_FILE=os.path.join(workdir, "counter.json"),
+            SPECTRUM_JOURNAL_DB=os.path.join(workdir, "gry.db"),
+            SPECTRUM_SESSION_DIR=os.path.join(workdir, "sesje"),
+            SPECTRUM_SEED_PARAM="1",    # ?seed= - powtarzalne losowanie pytań
+            SPECTRUM_PROFILE="1",       # panel ?debug=1 ze statystykami kolejki i stolików
+        )
+        self.outbox_dir = env["SPECTRUM_OUTBOX_DIR"]
+        self.log_path = os.path.join(workdir, "server.log")
+        self.log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP,
+             "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(self.port),
+             "--server.enableXsrfProtection", "false", "--server.fileWatcherType", "none",
+             "--browser.gatherUsageStats", "false", "--secrets.files", secrets],
+            cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        self.url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def wait_ready(self):
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as r:
+                    if r.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        sys.exit(f"Serwer Streamlit nie wystartował - log: {self.log_path}")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+class RemoteTable(game_flow.Table):
+    # Ta sama rozgrywka co w game_flow, ale przez websocket do wspólnego serwera zamiast AppTest
+    def __init__(self, url, seed=0, svg=False):
+        self.at = streamlit_client.Client(url)
+        self.at.query_params["seed"] = str(seed)
+        self.svg = svg
+        self.timings = []
+
+    def wait_for_upload(self, timeout):
+        # Jak przeglądarka: fragment statusu odpytuje zadanie co sekundę, aż zniknie "Zapisywanie"
+        self.at.idle(timeout, until=lambda c: not any("Zapisywanie" in text for text in c.texts()))
+        return next((text for text in self.at.texts() if "Wyniki zapisane" in text or "Błąd zapisu" in text), None)
+
+
+class Sampler(threading.Thread):
+    # Co interval sekund: czas, RSS serwera, pliki w outboxie, queue_stats() i rejestr stolików serwera
+    def __init__(self, interval, server):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.server = server
+        self.observer = streamlit_client.Client(server.url)
+        self.observer.query_params["debug"] = "1"
+        self.samples = []
+        self.stop = threading.Event()
+        self.start_time = time.perf_counter()
+
+    def run(self):
+        while not self.stop.is_set():
+            self.sample()
+            self.stop.wait(self.interval)
+
+    def sample(self):
+        try:
+            self.observer.run()
+            queue = self.observer.written("Kolejka uploadu:") or {}
+            tables = self.observer.written("Stoliki:") or {}
+        except Exception:   # obserwator nie może zatrzymać pomiaru
+            queue, tables = {}, {}
+        try:
+            outbox = sum(1 for n in os.listdir(self.server.outbox_dir) if n.endswith(".xlsx") and not n.startswith("."))
+        except FileNotFoundError:
+            outbox = 0
+        self.samples.append({
+            "t": time.perf_counter() - self.start_time, "rss": rss_mib(self.server.process.pid), "outbox": outbox,
+            **{key: queue.get(key, 0) for key in ("queued", "running", "rejected")},
+            "live": tables.get("live", 0), "state_bytes": tables.get("bytes", 0),
+        })
+
+    def idle(self):
+        last = self.samples[-1] if self.samples else None
+        return last is not None and not last["queued"] and not last["running"] and not last["outbox"]
+
+
+def play_table(index, args, url, barrier, results):
+    # Wątek jednego stolika: start wszystkich stolików naraz (barrier), gry po kolei
+    timings, errors, uploads = [], [], []
+    barrier.wait(timeout=START_TIMEOUT)
+    start = time.time()
+    for game in range(args.games):
+        # Tryby i plansze na zmianę między stolikami i kolejnymi grami
+        mode = game_flow.MODES[(index + game) % len(game_flow.MODES)]
+        virtual = (index + game) % 2 == 1
+        table = None
+        try:
+            table = RemoteTable(url, seed=index * 1000 + game, svg=args.svg)
+            table.play(mode, virtual, args.rounds)
+            upload_start = time.perf_counter()
+            status = table.wait_for_upload(UPLOAD_TIMEOUT)
+            uploads.append((time.perf_counter() - upload_start) * 1000)
+            if status is None or "Błąd" in status:
+                errors.append(f"stolik {index}, gra {game}: upload {status or 'bez odpowiedzi'}")
+        except Exception as e:
+            errors.append(f"stolik {index}, gra {game}: {e}")
+        finally:
+            if table is not None:
+                timings.extend(table.timings)
+                table.at.close()
+    results.append({"timings": timings, "errors": errors, "uploads": uploads, "start": start, "end": time.time()})
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Wiele stolików naraz na jednym serwerze Streamlit")
+    parser.add_argument("--tables", type=int, default=8)
+    parser.add_argument("--games", type=int, default=1, help="gier na stolik (po kolei)")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--svg", action="store_true")
+    parser.add_argument("--api-delay", type=float, default=0.05, help="opóźnienie atrapy API w sekundach")
+    parser.add_argument("--interval", type=float, default=1.0, help="co ile sekund próbka serwera")
+    args = parser.parse_args()
+
+    api = fake_github.start()
+    api.github.delay = args.api_delay
+    workdir = tempfile.mkdtemp(prefix="spectrum-load-")
+    server = Server(workdir, fake_github.url(api))
+    try:
+        server.wait_ready()
+        sampler = Sampler(args.interval, server)
+        sampler.start()
+        barrier = threading.Barrier(args.tables)
+        results = []
+        threads = [
+            threading.Thread(target=play_table, args=(i, args, server.url, barrier, results), daemon=True)
+            for i in range(args.tables)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Dosłanie wyników: aż kolejka serwera i outbox będą puste
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        while not sampler.idle() and time.monotonic() < deadline:
+            time.sleep(args.interval)
+        drained = time.time()
+        sampler.stop.set()
+        sampler.join()
+        peak = peak_rss_mib(server.process.pid)
+    finally:
+        server.stop()
+
+    games = args.tables * args.games
+    errors = [e for t in results for e in t["errors"]]
+    timings = [r for t in results for r in t["timings"]]
+    times = [ms for _, ms in timings]
+    uploads = [ms for t in results for ms in t["uploads"]]
+    print(f"stolików {args.tables} (jeden serwer, pid {server.process.pid}), gier {games}, "
+          f"interakcji {len(times)}, błędów {len(errors)}")
+    if results:
+        start = min(t["start"] for t in results)
+        play_seconds = max(t["end"] for t in results) - start
+        print(f"czas gry z uploadem {play_seconds:.1f} s | kolejka serwera pusta po {drained - start:.1f} s "
+              f"| uploady zakończone: {'tak' if sampler.idle() else 'NIE'}")
+    if times:
+        print(f"przepustowość {len(times) / play_seconds:.1f} interakcji/s, {games / play_seconds * 60:.1f} gier/min")
+        print(f"opóźnienie: p50 {percentile(times, 50):.1f} ms  p95 {percentile(times, 95):.1f} ms  "
+              f"p99 {percentile(times, 99):.1f} ms  max {max(times):.1f} ms")
+        print(f"{'interakcja':20} {'liczba':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for label in dict.fromkeys(l for l, _ in timings):
+            values = [ms for l, ms in timings if l == label]
+            print(f"{label:20} {len(values):6} {percentile(values, 50):7.1f}ms {percentile(values, 95):7.1f}ms "
+                  f"{percentile(values, 99):7.1f}ms")
+    if uploads:
+        print(f"upload (koniec gry -> ✅): p50 {percentile(uploads, 50):.0f} ms  p95 {percentile(uploads, 95):.0f} ms  "
+              f"max {max(uploads):.0f} ms")
+
+    print(f"\nczas [s]  RSS [MiB]  outbox  w kolejce  wysyłane  odrzucone  stoliki  stan [KiB]")
+    step = max(1, len(sampler.samples) // 15)
+    for s in sampler.samples[::step] + sampler.samples[-1:]:
+        print(f"{s['t']:7.1f}  {s['rss']:9.1f}  {s['outbox']:6}  {s['queued']:9}  {s['running']:8}  "
+              f"{s['rejected']:9}  {s['live']:7}  {s['state_bytes'] / 1024:10.1f}")
+    if sampler.samples:
+        print(f"szczyt RSS serwera: {peak or max(s['rss'] for s in sampler.samples):.1f} MiB, "
+              f"najdłuższa kolejka: {max(s['queued'] + s['running'] for s in sampler.samples)}")
+
+    files = [p for p in api.github.files if p.startswith("wyniki/")]
+    commits = len(api.github.commits) - 1
+    print(f"atrapa API: zapytań {api.github.requests}, połączeń {api.github.connections}, "
+          f"commitów {commits}, plików wyników {len(files)}")
+    for error in errors[:10]:
+        print("BŁĄD", error)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import json
+import time
+import urllib.parse
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+# ----------------------------------------------------------------------------------------------------------------
+# Minimalny klient protokołu Streamlit (websocket /_stcore/stream) - jedna instancja = jedna karta przeglądarki
+# podłączona do prawdziwego serwera `streamlit run`. Udaje AppTest w zakresie, którego używa game_flow.Table:
+# at.button/checkbox/text_input/slider, query_params, run(), exception. Fragmenty z run_every (upload,
+# bezczynność) odpytuje jak przeglądarka, ale tylko w idle() - między interakcjami gracza.
+#
+# Serwer musi działać z --server.enableXsrfProtection false (klient nie ma ciasteczka XSRF).
+# ----------------------------------------------------------------------------------------------------------------
+
+DONE = {
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+}
+
+
+class Widget:
+    # Zmiany jak w AppTest: najpierw akcja, potem client.run()
+    def __init__(self, client, kind, proto):
+        self.client = client
+        self.kind = kind
+        self.id = proto.id
+        self.label = proto.label
+
+    def click(self):
+        self.client.trigger = self.id
+        return self
+
+    def check(self):
+        self.client.values[self.id] = ("bool_value", True)
+        return self
+
+    def uncheck(self):
+        self.client.values[self.id] = ("bool_value", False)
+        return self
+
+    def input(self, text):
+        self.client.values[self.id] = ("string_value", text)
+        return self
+
+    def set_value(self, value):
+        if self.kind == "slider":
+            self.client.values[self.id] = ("double_array_value", [float(value)])
+        else:
+            self.client.values[self.id] = ("string_value", value)
+        return self
+
+
+class Client:
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.ws = connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout)
+        self.query_params = {}
+        self.values = {}        # id widgetu -> (pole WidgetState, wartość) ustawione przez "gracza"
+        self.trigger = None
+        self.page = {}          # ścieżka delty -> (rodzaj, proto) po ostatnim przebiegu
+        self.exception = []
+        self.auto_reruns = {}   # id fragmentu -> [interwał, kiedy następny przebieg]
+
+    def close(self):
+        self.ws.close()
+
+    def run(self, fragment_id=None):
+        message = BackMsg()
+        state = message.rerun_script
+        state.query_string = urllib.parse.urlencode(self.query_params)
+        state.page_script_hash = ""
+        for widget_id, (field, value) in self.values.items():
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            if field == "double_array_value":
+                widget.double_array_value.data.extend(value)
+            else:
+                setattr(widget, field, value)
+        if self.trigger is not None and fragment_id is None:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.trigger
+            widget.trigger_value = True
+        self.trigger = None
+        if fragment_id is not None:
+            state.fragment_id = fragment_id
+            state.is_auto_rerun = True
+        self.exception = []
+        self.ws.send(message.SerializeToString())
+        self.receive(fragment_id is not None)
+        return self
+
+    def receive(self, fragment):
+        elements = {}
+        deadline = time.monotonic() + self.timeout
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=max(0.1, deadline - time.monotonic())))
+            kind = msg.WhichOneof("type")
+            if kind == "new_session" and not msg.new_session.fragment_ids_this_run:
+                # Pełny przebieg (także po st.rerun() z fragmentu) - strona budowana od nowa
+                fragment = False
+                elements = {}
+                self.auto_reruns = {}
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                name = element.WhichOneof("type")
+                elements[tuple(msg.metadata.delta_path)] = (name, getattr(element, name))
+                if name == "exception":
+                    self.exception.append(element.exception.message)
+            elif kind == "page_info_changed":
+                self.query_params = dict(urllib.parse.parse_qsl(msg.page_info_changed.query_string))
+            elif kind == "auto_rerun":
+                interval = msg.auto_rerun.interval
+                self.auto_reruns[msg.auto_rerun.fragment_id] = [interval, time.monotonic() + interval]
+            elif kind == "script_finished" and msg.script_finished in DONE:
+                break
+        if fragment:
+            self.page.update(elements)
+        else:
+            self.page = elements
+        # Widgety, których już nie ma na stronie, nie wracają w kolejnych przebiegach
+        present = {proto.id for _, proto in self.page.values() if hasattr(proto, "id")}
+        self.values = {k: v for k, v in self.values.items() if k in present}
+
+    def idle(self, seconds, until=None):
+        # Czas bez interakcji: fragmenty z run_every przebiegają jak w przeglądarce.
+        # until(client) -> True kończy czekanie wcześniej
+        deadline = time.monotonic() + seconds
+        while until is None or not until(self):
+            due = [(when, fid) for fid, (_, when) in self.auto_reruns.items()]
+            if not due:
+                return
+            when, fragment_id = min(due)
+            if when > deadline:
+                return
+            time.sleep(max(0.0, when - time.monotonic()))
+            self.auto_reruns[fragment_id][1] = time.monotonic() + self.auto_reruns[fragment_id][0]
+            self.run(fragment_id)
+
+    def elements(self, kind):
+        return [proto for path, (name, proto) in sorted(self.page.items()) if name == kind]
+
+    def widgets(self, kind):
+        return [Widget(self, kind, proto) for proto in self.elements(kind)]
+
+    @property
+    def button(self):
+        return self.widgets("button")
+
+    @property
+    def checkbox(self):
+        return self.widgets("checkbox")
+
+    @property
+    def text_input(self):
+        return self.widgets("text_input")
+
+    @property
+    def slider(self):
+        return self.widgets("slider")
+
+    def texts(self):
+        # Treść markdown/st.info/st.error itp. w kolejności na stronie
+        return [proto.body for path, (name, proto) in sorted(self.page.items()) if name in ("markdown", "alert")]
+
+    def written(self, label):
+        # st.write("etykieta:", słownik) -> markdown z etykietą, zaraz po nim element json
+        items = sorted(self.page.items())
+        for (path, (name, proto)), (_, (next_name, next_proto)) in zip(items, items[1:]):
+            if name == "markdown" and proto.body.strip() == label and next_name == "json":
+                return json.loads(next_proto.body)
+        return None
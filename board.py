@@ -0,0 +1,235 @@
+import io
+import math
+import threading
+from functools import lru_cache
+
+# ----------------------------------------------------------------------------------------------------------------
+# Wirtualna plansza - rysowanie
+# ----------------------------------------------------------------------------------------------------------------
+
+total_width = 26
+half_width = total_width / 2
+center_base = 3
+
+colors = {
+    "2": "#FFDAB5",
+    "3": "#ADD8E6",
+    "4": "#3399FF",
+    "tlo": "#F5F5DC",
+    "promien": "red"
+}
+
+segment_sequence = [
+    ("2", colors["2"], 5),
+    ("3", colors["3"], 5),
+    ("4", colors["4"], 6),
+    ("3", colors["3"], 5),
+    ("2", colors["2"], 5)
+]
+
+# Te same ustawienia co domyślne w st.pyplot
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200, "format": "png"}
+
+# Suwak ma tylko 201 pozycji, więc obrazki są cache'owane dla całego procesu
+CACHE_SIZE = 512
+
+_render_lock = threading.Lock()
+
+# ------------------------------
+# Przeliczanie suwaków na kąty
+# ------------------------------
+
+def quantize(slider_val):
+    return max(-100, min(100, int(round(slider_val))))
+
+def answer_angle(answer_slider):
+    return 174 - (answer_slider + 100) * 174 / 200 # -100 => 174 ;  100 => 0
+
+def guess_angle(guess_slider):
+    return 177 - (guess_slider + 100) / 200 * (177 - 3)
+
+def direction_angle(guess_slider):
+    return 177.5 - (guess_slider + 100) / 200 * (177.5 - 2.5)
+
+# ------------------------------
+# Rysowanie figur
+# ------------------------------
+
+# numpy i matplotlib ładujemy dopiero przy pierwszym rysowaniu PNG - tryb fizyczny
+# i plansza SVG w ogóle ich nie potrzebują
+
+def new_board():
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    # Figure bez pyplot - nic nie trafia do globalnego rejestru figur
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.set_aspect('equal')
+    ax.axis('off')
+    # Tło półkola
+    theta_bg = np.linspace(0, 180, 300)
+    x_bg = np.cos(np.deg2rad(theta_bg))
+    y_bg = np.sin(np.deg2rad(theta_bg))
+    ax.fill(np.append(x_bg, 0), np.append(y_bg, 0), color=colors["tlo"])
+    return fig, ax
+
+def draw_answer(ax, center_angle, width, color):
+    import numpy as np
+
+    theta1 = center_angle - width / 2
+    theta2 = center_angle + width / 2
+    theta1_clip = max(theta1, 0)
+    theta2_clip = min(theta2, 180)
+    if theta1_clip >= theta2_clip:
+        return
+    theta = np.linspace(theta1_clip, theta2_clip, 100)
+    x = np.cos(np.deg2rad(theta))
+    y = np.sin(np.deg2rad(theta))
+    x = np.append(x, 0)
+    y = np.append(y, 0)
+    ax.fill(x, y, color=color, alpha=1)
+
+def draw_segments(ax, answer_deg):
+    current_angle = center_base - half_width + answer_deg
+    for label, color, width in segment_sequence:
+        center_angle = current_angle + width / 2
+        draw_answer(ax, center_angle, width, color)
+        current_angle += width
+
+def draw_ray(ax, angle_deg, linewidth):
+    import numpy as np
+
+    rad = np.deg2rad(angle_deg)
+    ax.plot([0, np.cos(rad)], [0, np.sin(rad)], color=colors["promien"], linewidth=linewidth)
+
+def to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG_OPTIONS)
+    fig.clear()
+    return buffer.getvalue()
+
+# ------------------------------
+# Obrazki PNG (LRU)
+# ------------------------------
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _answer_png(answer_slider):
+    with _render_lock:
+        fig, ax = new_board()
+        draw_segments(ax, answer_angle(answer_slider))
+        return to_png(fig)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _guess_png(angle_deg):
+    with _render_lock:
+        fig, ax = new_board()
+        draw_ray(ax, angle_deg, 3)
+        return to_png(fig)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _score_png(answer_slider, guess_slider):
+    with _render_lock:
+        fig, ax = new_board()
+        draw_segments(ax, answer_angle(answer_slider))
+        draw_ray(ax, guess_angle(guess_slider), 1)
+        return to_png(fig)
+
+def answer_png(answer_slider):
+    return _answer_png(quantize(answer_slider))
+
+def guess_png(guess_slider):
+    return _guess_png(guess_angle(quantize(guess_slider)))
+
+def direction_png(guess_slider):
+    return _guess_png(direction_angle(quantize(guess_slider)))
+
+def score_png(answer_slider, guess_slider):
+    return _score_png(quantize(answer_slider), quantize(guess_slider))
+
+def cache_info():
+    return {
+        "answer": _answer_png.cache_info(),
+        "guess": _guess_png.cache_info(),
+        "score": _score_png.cache_info(),
+    }
+
+
+# ------------------------------
+# Lekka plansza SVG
+# ------------------------------
+
+# Półkole o promieniu SVG_RADIUS, oś y odwrócona względem matplotlib
+SVG_RADIUS = 100
+SVG_HEADER = (
+    f'<svg viewBox="{-SVG_RADIUS * 1.05:g} {-SVG_RADIUS * 1.05:g} '
+    f'{SVG_RADIUS * 2.1:g} {SVG_RADIUS * 1.1:g}" preserveAspectRatio="xMidYMid meet">'
+)
+SVG_BACKGROUND = (
+    f'<path d="M{-SVG_RADIUS} 0A{SVG_RADIUS} {SVG_RADIUS} 0 0 1 {SVG_RADIUS} 0Z" fill="{colors["tlo"]}"/>'
+)
+# Grubość promienia w jednostkach planszy (3 pt i 1 pt na figurze 8x4)
+SVG_RAY_WIDTH = {"guess": 1.5, "score": 0.5}
+
+def unit_point(angle_deg):
+    rad = math.radians(angle_deg)
+    return SVG_RADIUS * math.cos(rad), -SVG_RADIUS * math.sin(rad)
+
+def wedge_path(theta1, theta2, color):
+    theta1 = max(theta1, 0)
+    theta2 = min(theta2, 180)
+    if theta1 >= theta2:
+        return ""
+    x1, y1 = unit_point(theta1)
+    x2, y2 = unit_point(theta2)
+    return (
+        f'<path d="M0 0L{x1:.2f} {y1:.2f}A{SVG_RADIUS} {SVG_RADIUS} 0 0 0 {x2:.2f} {y2:.2f}Z" '
+        f'fill="{color}"/>'
+    )
+
+@lru_cache(maxsize=None)
+def arc_tables():
+    # Wszystkie 201 pozycji suwaka policzone raz: segmenty odpowiedzi i końce promieni
+    positions = range(-100, 101)
+    segments = {}
+    for slider in positions:
+        paths = []
+        current_angle = center_base - half_width + answer_angle(slider)
+        for label, color, width in segment_sequence:
+            paths.append(wedge_path(current_angle, current_angle + width, color))
+            current_angle += width
+        segments[slider] = "".join(paths)
+    guess_ends = {slider: unit_point(guess_angle(slider)) for slider in positions}
+    direction_ends = {slider: unit_point(direction_angle(slider)) for slider in positions}
+    return segments, guess_ends, direction_ends
+
+def ray_line(end, width):
+    x, y = end
+    return (
+        f'<line x1="0" y1="0" x2="{x:.2f}" y2="{y:.2f}" '
+        f'stroke="{colors["promien"]}" stroke-width="{width}"/>'
+    )
+
+def answer_svg(answer_slider):
+    segments, _, _ = arc_tables()
+    return SVG_HEADER + SVG_BACKGROUND + segments[quantize(answer_slider)] + "</svg>"
+
+def guess_svg(guess_slider):
+    _, guess_ends, _ = arc_tables()
+    ray = ray_line(guess_ends[quantize(guess_slider)], SVG_RAY_WIDTH["guess"])
+    return SVG_HEADER + SVG_BACKGROUND + ray + "</svg>"
+
+def direction_svg(guess_slider):
+    _, _, direction_ends = arc_tables()
+    ray = ray_line(direction_ends[quantize(guess_slider)], SVG_RAY_WIDTH["guess"])
+    return SVG_HEADER + SVG_BACKGROUND + ray + "</svg>"
+
+def score_svg(answer_slider, guess_slider):
+    segments, guess_ends, _ = arc_tables()
+    ray = ray_line(guess_ends[quantize(guess_slider)], SVG_RAY_WIDTH["score"])
+    return SVG_HEADER + SVG_BACKGROUND + segments[quantize(answer_slider)] + ray + "</svg>"
+
+RENDERERS = {
+    "png": {"answer": answer_png, "guess": guess_png, "direction": direction_png, "score": score_png},
+    "svg": {"answer": answer_svg, "guess": guess_svg, "direction": direction_svg, "score": score_svg},
+}
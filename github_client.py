@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ----------------------------------------------------------------------------------------------------------------
+# Wspólny klient HTTP dla API GitHuba - jedna pula połączeń keep-alive na cały proces
+# ----------------------------------------------------------------------------------------------------------------
+
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+TIMEOUT = (5, 30)       # (połączenie, odpowiedź) w sekundach
+POOL_SIZE = 4           # maks. równoległych połączeń do jednego hosta
+LATENCY_WINDOW = 500    # ile ostatnich czasów trzymamy do p50/p95
+CACHE_DIR = os.environ.get("GITHUB_CACHE_DIR", ".github_cache")
+CACHE_MAX_AGE = 10      # sekundy, przez które odpowiedź podajemy bez pytania serwera
+
+
+class ContentsCache:
+    # Odpowiedzi GET (treść + ETag) w pamięci i na dysku. Rewalidacja przez If-None-Match:
+    # 304 nie przesyła treści i nie zużywa limitu zapytań API.
+    def __init__(self, directory=CACHE_DIR, max_age=CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.counters = {"hit": 0, "not_modified": 0, "miss": 0}
+
+    def _file(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None and self.directory:
+            try:
+                with open(self._file(url), encoding="utf-8") as f:
+                    entry = json.load(f)
+                entry["fetched"] = 0.0   # z dysku - zawsze rewalidujemy
+            except (FileNotFoundError, ValueError):
+                return None
+            with self._lock:
+                self._entries[url] = entry
+        return entry
+
+    def put(self, url, etag, body):
+        entry = {"etag": etag, "body": body, "fetched": time.monotonic()}
+        with self._lock:
+            self._entries[url] = entry
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_file = f"{self._file(url)}.{threading.get_ident()}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump({"etag": etag, "body": body}, f)
+            os.replace(temp_file, self._file(url))
+        return entry
+
+    def refresh(self, entry):
+        entry["fetched"] = time.monotonic()
+
+    def fresh(self, entry):
+        return time.monotonic() - entry["fetched"] < self.max_age
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+        if self.directory:
+            try:
+                os.remove(self._file(url))
+            except FileNotFoundError:
+                pass
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+class GitHubClient:
+    def __init__(self, base_url=API_URL, pool_size=POOL_SIZE, timeout=TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        # pool_block=True: przy pool_size zajętych połączeniach kolejne zapytanie czeka,
+        # zamiast otwierać dodatkowe połączenie do tego samego hosta
+        self.adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._errors = 0
+        self.cache = ContentsCache()
+
+    def url(self, path):
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    def request(self, method, path, token=None, **kwargs):
+        url = self.url(path)
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"token {token}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        start = time.perf_counter()
+        try:
+            return self.session.request(method, url, headers=headers, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls += 1
+                self._latencies.append(time.perf_counter() - start)
+
+    def get(self, path, token=None, **kwargs):
+        return self.request("GET", path, token, **kwargs)
+
+    def put(self, path, token=None, **kwargs):
+        return self.request("PUT", path, token, **kwargs)
+
+    def get_cached(self, path, token=None):
+        # Zwraca (status, json); 200 może pochodzić z cache (świeży wpis albo 304)
+        url = self.url(path)
+        entry = self.cache.get(url)
+        if entry is not None and self.cache.fresh(entry):
+            self.cache.count("hit")
+            return 200, entry["body"]
+
+        headers = {"If-None-Match": entry["etag"]} if entry is not None else {}
+        response = self.get(url, token, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(entry)
+            self.cache.count("not_modified")
+            return 200, entry["body"]
+
+        self.cache.count("miss")
+        if response.status_code == 200 and response.headers.get("ETag"):
+            self.cache.put(url, response.headers["ETag"], response.json())
+        elif entry is not None:
+            self.cache.invalidate(url)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def invalidate(self, path):
+        self.cache.invalidate(self.url(path))
+
+    def stats(self):
+        opened = 0
+        sent = 0
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls = self._calls
+            errors = self._errors
+        return {
+            "calls": calls,
+            "errors": errors,
+            "connections_opened": opened,
+            "connections_reused": max(sent - opened, 0),
+            "latency_p50_ms": percentile(latencies, 50) * 1000,
+            "latency_p95_ms": percentile(latencies, 95) * 1000,
+            "cache": dict(self.cache.counters),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubClient()
+        return _client
@@ -0,0 +1,443 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows - zostaje sama blokada w obrębie procesu
+    fcntl = None
+
+import profiling
+from github_client import get_client
+
+# ----------------------------------------------------------------------------------------------------------------
+# Upload na GitHub - wykonywany w tle, poza wątkiem renderującym Streamlit
+# ----------------------------------------------------------------------------------------------------------------
+
+MAX_ATTEMPTS = 4
+BACKOFF = 1.0           # 1 s, 2 s, 4 s ...
+MAX_WORKERS = 2
+MAX_PENDING = 32        # więcej zadań w kolejce = odmowa zamiast rosnącej kolejki
+
+COUNTER_FILE = os.environ.get("SPECTRUM_COUNTER_FILE", ".game_counter.json")
+COUNTER_DAYS = 7        # ile ostatnich dni trzyma licznik
+
+OUTBOX_DIR = os.environ.get("SPECTRUM_OUTBOX_DIR", "wyniki_outbox")
+RESULTS_DIR = "wyniki"
+BRANCH = "main"
+BATCH_WINDOW = 2.0      # sekundy czekania na inne kończące się gry przed commitem
+MAX_COMMIT_ATTEMPTS = 5
+
+
+class UploadError(Exception):
+    pass
+
+# ------------------------------
+# Zapytania do API (wspólny klient z pulą połączeń)
+# ------------------------------
+
+def as_bytes(data):
+    # bytes albo bufor w pamięci (BytesIO) - bez kopiowania przez plik na dysku
+    return data.getbuffer() if hasattr(data, "getbuffer") else data
+
+def upload_to_github(data, repo, path_in_repo, token, commit_message, sha=None):
+    b64_content = base64.b64encode(as_bytes(data)).decode("utf-8")
+
+    data = {
+        "message": commit_message,
+        "content": b64_content,
+        "branch": "main"
+    }
+    if sha:
+        data["sha"] = sha
+
+    response = get_client().put(f"/repos/{repo}/contents/{path_in_repo}", token, json=data)
+    return response
+
+def get_contents(repo, path_in_repo, token):
+    # Odczyt przez cache z ETagiem - niezmieniony plik kosztuje 304 albo nic
+    return get_client().get_cached(f"/repos/{repo}/contents/{path_in_repo}", token)
+
+def update_on_github(data, repo, path_in_repo, token, commit_message):
+    # Nadpisanie istniejącego pliku wymaga jego aktualnego "sha"
+    status, body = get_contents(repo, path_in_repo, token)
+    sha = body.get("sha") if status == 200 and isinstance(body, dict) else None
+    response = upload_to_github(data, repo, path_in_repo, token, commit_message, sha)
+    get_client().invalidate(f"/repos/{repo}/contents/{path_in_repo}")
+    return response
+
+def with_retries(call, attempts=MAX_ATTEMPTS, backoff=BACKOFF, status=lambda r: r.status_code):
+    # Ponawiamy błędy sieci, 5xx i 429; inne odpowiedzi zwracamy od razu
+    for attempt in range(attempts):
+        error = None
+        try:
+            response = call()
+        except requests.RequestException as e:
+            error = e
+        else:
+            if status(response) < 500 and status(response) != 429:
+                return response
+        if attempt < attempts - 1:
+            time.sleep(backoff * 2 ** attempt)
+    if error is not None:
+        raise UploadError(f"Brak połączenia z GitHub: {error}")
+    return response
+
+def error_details(response):
+    try:
+        return response.json()
+    except ValueError:
+        return response.text[:200]
+
+def git_api(method, path, token, expected, **kwargs):
+    # Zapytanie do Git Data API z ponawianiem; nieoczekiwany status -> UploadError
+    response = with_retries(lambda: get_client().request(method, path, token, **kwargs))
+    if response.status_code not in expected:
+        raise UploadError(f"{response.status_code} – {error_details(response)}")
+    return response
+
+def blob_sha(content):
+    # Ten sam skrót co git: sha1("blob <rozmiar>\0" + treść)
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+# ------------------------------
+# Numer gry
+# ------------------------------
+
+# Licznik gier na dzień trzymany lokalnie (plik + blokada), zamiast listowania całego
+# folderu wyniki/ przy każdej grze. Przed commitem sprawdzamy tylko nazwy z paczki
+# (zapytanie warunkowe o każdy plik) - gdy nazwa jest zajęta (inny serwer, utracony licznik),
+# jedno listowanie wyniki/ i licznik przeskakuje za najwyższy numer tego dnia w repo.
+
+_counter_lock = threading.Lock()
+
+def next_game_number(day, counter_file=COUNTER_FILE, at_least=0):
+    with _counter_lock, open(counter_file + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            with open(counter_file, encoding="utf-8") as f:
+                counters = json.load(f)
+        except (FileNotFoundError, ValueError):
+            counters = {}
+        number = max(counters.get(day, 0), at_least) + 1
+        counters[day] = number
+        # Stare dni nie są już potrzebne
+        counters = dict(sorted(counters.items())[-COUNTER_DAYS:])
+        temp_file = f"{counter_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(counters, f)
+        os.replace(temp_file, counter_file)
+        return number
+
+def game_file_name(day, number):
+    return f"{day}_gra{number:03d}.xlsx"
+
+def game_number(file_name, day):
+    # Numer gry z nazwy pliku danego dnia, 0 dla innych plików
+    prefix = f"{day}_gra"
+    if file_name.startswith(prefix) and file_name.endswith(".xlsx"):
+        number = file_name[len(prefix):-len(".xlsx")]
+        if number.isdigit():
+            return int(number)
+    return 0
+
+# ------------------------------
+# Skrzynka nadawcza (outbox)
+# ------------------------------
+
+# Skończona gra trafia najpierw do lokalnego folderu - nic nie ginie przy awarii sieci
+# ani restarcie. Flusher wysyła wszystkie czekające pliki jednym commitem (Git Data API:
+# blobs -> tree -> commit -> ref). Powtórka jest bezpieczna: plik, który już jest w repo
+# z tą samą treścią, tylko usuwamy z folderu. Zmiana nazwy (numer zajęty w repo) zostawia
+# obok plik <stara nazwa>.renamed z nową nazwą - status gry da się ustalić z dysku także
+# po restarcie i z innego procesu.
+
+_flush_lock = threading.Lock()
+
+def enqueue_results(data, outbox_dir=OUTBOX_DIR):
+    os.makedirs(outbox_dir, exist_ok=True)
+    today_str = datetime.today().strftime("%Y-%m-%d")
+    file_name = game_file_name(today_str, next_game_number(today_str))
+    temp_file = os.path.join(outbox_dir, f".{file_name}.tmp")
+    with open(temp_file, "wb") as f:
+        f.write(as_bytes(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, os.path.join(outbox_dir, file_name))
+    return file_name
+
+def outbox_files(outbox_dir=OUTBOX_DIR):
+    try:
+        names = os.listdir(outbox_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if n.endswith(".xlsx") and not n.startswith("."))
+
+def rename_in_outbox(file_name, outbox_dir, taken):
+    # Nowy numer za najwyższym zajętym tego dnia (repo + outbox) - bez sprawdzania nazw po kolei
+    day = file_name.split("_", 1)[0]
+    highest = max((game_number(name, day) for name in (*taken, *outbox_files(outbox_dir))), default=0)
+    new_name = game_file_name(day, next_game_number(day, at_least=highest))
+    # Najpierw wskazanie nowej nazwy, potem przeniesienie - current_name() idzie za wskazaniem
+    # dopiero, gdy starego pliku już nie ma
+    temp_file = os.path.join(outbox_dir, f".{file_name}.renamed.tmp")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(new_name)
+    os.replace(temp_file, renamed_path(outbox_dir, file_name))
+    os.replace(os.path.join(outbox_dir, file_name), os.path.join(outbox_dir, new_name))
+    return new_name
+
+def renamed_path(outbox_dir, file_name):
+    return os.path.join(outbox_dir, f"{file_name}.renamed")
+
+def current_name(file_name, outbox_dir=OUTBOX_DIR):
+    # Aktualna nazwa pliku gry: za wskazaniami .renamed, póki plik pod daną nazwą nie czeka w outboxie
+    while not os.path.exists(os.path.join(outbox_dir, file_name)):
+        try:
+            with open(renamed_path(outbox_dir, file_name), encoding="utf-8") as f:
+                file_name = f.read().strip()
+        except FileNotFoundError:
+            break
+    return file_name
+
+def prune_renamed(outbox_dir):
+    # Wskazania starsze niż licznik gier nikt już nie sprawdzi
+    cutoff = time.time() - COUNTER_DAYS * 86400
+    for entry in os.scandir(outbox_dir):
+        if entry.name.endswith(".renamed") and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+
+def branch_head(repo, token):
+    # (sha commita, sha drzewa) końcówki gałęzi
+    api = f"/repos/{repo}/git"
+    head = git_api("GET", f"{api}/ref/heads/{BRANCH}", token, (200,)).json()["object"]["sha"]
+    base_tree = git_api("GET", f"{api}/commits/{head}", token, (200,)).json()["tree"]["sha"]
+    return head, base_tree
+
+def remote_sha(repo, token, file_name):
+    # sha bloba pliku w wyniki/ albo None (404 = nazwa wolna). Zapytanie z ETagiem przez cache klienta;
+    # 404 nie trafia do cache, więc "wolna" zawsze pochodzi z serwera. Stan gałęzi jest tu nowszy
+    # albo równy base_tree - plik dodany po naszym odczycie końcówki i tak zatrzyma commit (brak fast-forward).
+    status, body = with_retries(lambda: get_contents(repo, f"{RESULTS_DIR}/{file_name}", token), status=lambda r: r[0])
+    if status == 404:
+        return None
+    if status != 200 or not isinstance(body, dict):
+        raise UploadError(f"{status} – {body}")
+    return body.get("sha")
+
+def remote_files(repo, token, base_tree):
+    # {nazwa: sha bloba} plików w wyniki/ dla drzewa base_tree - dwa zapytania niezależnie od liczby
+    # plików (drzewa bez limitu 1000 wpisów listowania contents); tylko przy kolizji nazw
+    api = f"/repos/{repo}/git"
+    root = git_api("GET", f"{api}/trees/{base_tree}", token, (200,)).json()["tree"]
+    folder = next((e["sha"] for e in root if e["path"] == RESULTS_DIR and e["type"] == "tree"), None)
+    if folder is None:
+        return {}
+    entries = git_api("GET", f"{api}/trees/{folder}", token, (200,)).json()["tree"]
+    return {e["path"]: e["sha"] for e in entries if e["type"] == "blob"}
+
+def pending_batch(repo, token, outbox_dir, base_tree):
+    # {nazwa: treść} plików, których jeszcze nie ma w repo
+    remote = None       # listowanie wyniki/ - dopiero przy pierwszej kolizji
+    batch = {}
+    for file_name in outbox_files(outbox_dir):
+        local_path = os.path.join(outbox_dir, file_name)
+        with open(local_path, "rb") as f:
+            content = f.read()
+        sha = remote_sha(repo, token, file_name)
+        if sha == blob_sha(content):
+            # Już wysłany (np. awaria po commicie, przed usunięciem pliku)
+            os.remove(local_path)
+            continue
+        if sha is not None:
+            if remote is None:
+                remote = remote_files(repo, token, base_tree)
+            file_name = rename_in_outbox(file_name, outbox_dir, remote)
+        batch[file_name] = content
+    return batch
+
+def commit_batch(batch, repo, token, head, base_tree):
+    # Jeden commit z wieloma plikami na head; False, gdy gałąź przesunęła się w międzyczasie
+    api = f"/repos/{repo}/git"
+
+    tree = []
+    for file_name, content in batch.items():
+        blob = git_api("POST", f"{api}/blobs", token, (201,), json={
+            "content": base64.b64encode(content).decode("utf-8"),
+            "encoding": "base64",
+        }).json()["sha"]
+        tree.append({"path": f"{RESULTS_DIR}/{file_name}", "mode": "100644", "type": "blob", "sha": blob})
+    new_tree = git_api("POST", f"{api}/trees", token, (201,), json={
+        "base_tree": base_tree, "tree": tree,
+    }).json()["sha"]
+
+    names = ", ".join(batch)
+    message = f"🎉 Wyniki gry: {names}" if len(batch) == 1 else f"🎉 Wyniki gier: {names}"
+    commit = git_api("POST", f"{api}/commits", token, (201,), json={
+        "message": message, "tree": new_tree, "parents": [head],
+    }).json()["sha"]
+
+    response = git_api("PATCH", f"{api}/refs/heads/{BRANCH}", token, (200, 422), json={
+        "sha": commit, "force": False,
+    })
+    if response.status_code == 422:
+        # Tylko brak fast-forward ponawiamy; inne 422 (np. brak uprawnień do gałęzi) to błąd
+        details = error_details(response)
+        message = details.get("message", "") if isinstance(details, dict) else details
+        if "not a fast forward" not in message.lower():
+            raise UploadError(f"422 – {details}")
+        return False
+    return True
+
+def flush_outbox(repo, token, outbox_dir=OUTBOX_DIR):
+    # Zwraca listę wysłanych plików
+    os.makedirs(outbox_dir, exist_ok=True)
+    with _flush_lock, open(os.path.join(outbox_dir, ".lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        prune_renamed(outbox_dir)
+        for _ in range(MAX_COMMIT_ATTEMPTS):
+            if not outbox_files(outbox_dir):
+                return []
+            # Listowanie i commit z tej samej końcówki gałęzi - zmiana w międzyczasie to brak fast-forward
+            head, base_tree = branch_head(repo, token)
+            batch = pending_batch(repo, token, outbox_dir, base_tree)
+            if not batch:
+                return []
+            if commit_batch(batch, repo, token, head, base_tree):
+                for file_name in batch:
+                    os.remove(os.path.join(outbox_dir, file_name))
+                return list(batch)
+            # Nie fast-forward: ktoś commitował w międzyczasie (albo nasz PATCH doszedł,
+            # a odpowiedź nie) - kolejne podejście sprawdzi stan repo od nowa
+    raise UploadError("Gałąź zmienia się zbyt szybko, spróbuj za chwilę.")
+
+# ------------------------------
+# Zadania w tle
+# ------------------------------
+
+class UploadJob:
+    # Uchwyt zadania - UI tylko odczytuje status, nie czeka na wynik
+    def __init__(self, description):
+        self.description = description
+        self.status = "queued"   # queued / running / done / failed
+        self.message = ""
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="github-upload")
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+_queue_lock = threading.Lock()
+_queue = {"queued": 0, "running": 0, "rejected": 0}
+
+def _move(source, target):
+    with _queue_lock:
+        if source:
+            _queue[source] -= 1
+        if target:
+            _queue[target] += 1
+
+def queue_stats():
+    # Stan kolejki uploadu (panel diagnostyczny, load test)
+    with _queue_lock:
+        return dict(_queue)
+
+def submit(description, work, *args):
+    job = UploadJob(description)
+    if not _pending.acquire(blocking=False):
+        _move(None, "rejected")
+        job.status = "failed"
+        job.message = "Kolejka wysyłania jest pełna, spróbuj za chwilę."
+        return job
+    _move(None, "queued")
+
+    def run():
+        _move("queued", "running")
+        job.status = "running"
+        try:
+            with profiling.span(f"job_{description}"):
+                job.message = work(*args)
+            job.status = "done"
+        except Exception as e:
+            job.message = str(e)
+            job.status = "failed"
+        finally:
+            _move("running", None)
+            _pending.release()
+
+    job.future = _executor.submit(run)
+    return job
+
+# Gry kończące się w oknie BATCH_WINDOW idą jednym commitem. Okno odmierza Timer, nie zadanie
+# w puli - czekające gry nie zajmują wątków wysyłki; po oknie jeden flush obsługuje wszystkie.
+
+class Batch:
+    def __init__(self, repo, token, outbox_dir, window=BATCH_WINDOW):
+        self.repo = repo
+        self.token = token
+        self.outbox_dir = outbox_dir
+        self.window = window
+        self._lock = threading.Lock()
+        self._waiting = []      # (nazwa pliku, UploadJob)
+        self._timer = None
+
+    def add(self, file_name):
+        job = UploadJob(f"wyniki {file_name}")
+        _move(None, "queued")
+        with self._lock:
+            self._waiting.append((file_name, job))
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.fire)
+                self._timer.daemon = True
+                self._timer.start()
+        return job
+
+    def fire(self):
+        with self._lock:
+            waiting, self._waiting, self._timer = self._waiting, [], None
+        flush = submit("wyniki", flush_outbox, self.repo, self.token, self.outbox_dir)
+        for _, job in waiting:
+            job.status = "running"
+            _move("queued", None)
+        if flush.future is None:    # kolejka pełna
+            self.resolve(waiting, flush)
+        else:
+            flush.future.add_done_callback(lambda _: self.resolve(waiting, flush))
+
+    def resolve(self, waiting, flush):
+        outbox = outbox_files(self.outbox_dir)
+        for file_name, job in waiting:
+            file_name = current_name(file_name, self.outbox_dir)
+            if flush.status == "failed":
+                job.message = flush.message
+                job.status = "failed"
+            elif file_name in outbox:
+                job.message = f"{file_name} czeka w kolejce do wysłania"
+                job.status = "failed"
+            else:
+                job.message = file_name
+                job.status = "done"
+
+
+_batches = {}
+_batches_lock = threading.Lock()
+
+def upload_results(file_name, repo, token, outbox_dir=OUTBOX_DIR):
+    # Uchwyt zadania, które kończy się razem z commitem zawierającym ten plik
+    with _batches_lock:
+        batch = _batches.get((repo, token, outbox_dir))
+        if batch is None:
+            batch = _batches[(repo, token, outbox_dir)] = Batch(repo, token, outbox_dir)
+    return batch.add(file_name)
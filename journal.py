@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ----------------------------------------------------------------------------------------------------------------
+# Dziennik gier (SQLite, WAL): ustawienia gry raz przy starcie, potem jeden wiersz na zapisane pytanie.
+# Zapis rundy = jeden INSERT, niezależnie od długości gry; wznowienie = jedno zapytanie.
+# Pytania po id, nie po indeksie w banku - dziennik przeżywa przebudowę questions.bin / questions.db.
+# Grę wznawia tylko właściciel (skrót klucza z adresu stolika); gra po ekranie końcowym jest zamknięta.
+#
+#   SPECTRUM_JOURNAL_DB=gry.db
+# ----------------------------------------------------------------------------------------------------------------
+
+JOURNAL_DB = os.environ.get("SPECTRUM_JOURNAL_DB", "gry.db")
+JOURNAL_DAYS = 7        # niedokończone gry starsze niż tyle dni są usuwane
+RESUME_HOURS = 24       # ekran wznowienia pokazuje gry z ostatniej doby
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    table_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    setup TEXT NOT NULL,
+    started REAL NOT NULL,
+    updated REAL NOT NULL,
+    owner TEXT,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS games_updated ON games (updated);
+CREATE TABLE IF NOT EXISTS rounds (
+    table_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (table_id, seq)
+) WITHOUT ROWID;
+"""
+# Kolumny dodane później - dopisywane do istniejącej bazy
+MIGRATIONS = (
+    ("owner", "ALTER TABLE games ADD COLUMN owner TEXT"),
+    ("finished", "ALTER TABLE games ADD COLUMN finished INTEGER NOT NULL DEFAULT 0"),
+)
+
+
+class GameJournal:
+    def __init__(self, path=JOURNAL_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        # Jedno połączenie na proces pod blokadą - reruny Streamlit chodzą w coraz to nowych wątkach
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")   # odporne na restart procesu, nie na utratę zasilania
+        self.conn.executescript(SCHEMA)
+        self.migrate()
+        self.prune()
+
+    def migrate(self):
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(games)")}
+        for column, sql in MIGRATIONS:
+            if column not in columns:
+                self.conn.execute(sql)
+
+    def write(self, *statements):
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self.conn.execute(sql, params)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def start(self, table_id, mode, setup, owner):
+        # owner: skrót klucza właściciela stolika (sessions.owner_hash)
+        now = time.time()
+        self.write(
+            ("DELETE FROM rounds WHERE table_id = ?", (table_id,)),
+            ("INSERT OR REPLACE INTO games (table_id, mode, setup, started, updated, owner) VALUES (?, ?, ?, ?, ?, ?)",
+             (table_id, mode, json.dumps(setup, ensure_ascii=False), now, now, owner)),
+        )
+
+    def append(self, table_id, seq, data):
+        self.write(
+            ("INSERT OR REPLACE INTO rounds (table_id, seq, data) VALUES (?, ?, ?)",
+             (table_id, seq, json.dumps(data, ensure_ascii=False))),
+            ("UPDATE games SET updated = ? WHERE table_id = ?", (time.time(), table_id)),
+        )
+
+    def load(self, table_id, owner):
+        # (tryb, ustawienia, [rundy po kolei]) niedokończonej gry tego właściciela albo None
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT g.mode, g.setup, r.data FROM games g LEFT JOIN rounds r USING (table_id) "
+                "WHERE g.table_id = ? AND g.owner = ? AND NOT g.finished ORDER BY r.seq", (table_id, owner)
+            ).fetchall()
+        if not rows:
+            return None
+        mode, setup = rows[0][0], json.loads(rows[0][1])
+        return mode, setup, [json.loads(data) for _, _, data in rows if data is not None]
+
+    def pending(self, table_id, owner, hours=RESUME_HOURS):
+        # (tryb, ustawienia, ostatni zapis, zapisanych pytań) gry do wznowienia albo None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT g.mode, g.setup, g.updated, COUNT(r.seq) FROM games g LEFT JOIN rounds r USING (table_id) "
+                "WHERE g.table_id = ? AND g.owner = ? AND NOT g.finished AND g.updated > ? GROUP BY g.table_id",
+                (table_id, owner, time.time() - hours * 3600)
+            ).fetchone()
+        if row is None:
+            return None
+        mode, setup, updated, count = row
+        return mode, json.loads(setup), updated, count
+
+    def finish(self, table_id):
+        # Ekran końcowy - gry nie da się już wznowić; wiersze usunie prune() po JOURNAL_DAYS
+        self.write(("UPDATE games SET finished = 1, updated = ? WHERE table_id = ?", (time.time(), table_id)))
+
+    def reopen(self, table_id):
+        # "Jeszcze nie kończymy!" po ekranie końcowym - gra znów do wznowienia
+        self.write(("UPDATE games SET finished = 0, updated = ? WHERE table_id = ?", (time.time(), table_id)))
+
+    def close(self, table_id):
+        self.write(
+            ("DELETE FROM rounds WHERE table_id = ?", (table_id,)),
+            ("DELETE FROM games WHERE table_id = ?", (table_id,)),
+        )
+
+    def prune(self):
+        cutoff = time.time() - JOURNAL_DAYS * 86400
+        self.write(
+            ("DELETE FROM rounds WHERE table_id IN (SELECT table_id FROM games WHERE updated < ?)", (cutoff,)),
+            ("DELETE FROM games WHERE updated < ?", (cutoff,)),
+        )
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+# ----------------------------------------------------------------------------------------------------------------
+# Pomiary czasu rerunów i gorących ścieżek
+#
+#   SPECTRUM_PROFILE=1 streamlit run streamlit_app.py      -> linia JSON na rerun (stderr)
+#   ...i ?debug=1 w adresie                                -> panel z p50/p95 w pasku bocznym
+#
+# Wyłączone: span() zwraca wspólny nullcontext, nic nie jest mierzone ani zapisywane.
+# ----------------------------------------------------------------------------------------------------------------
+
+ENABLED = os.environ.get("SPECTRUM_PROFILE", "") not in ("", "0")
+WINDOW = 500            # ile ostatnich pomiarów na klucz trzymamy do p50/p95
+
+logger = logging.getLogger("spectrum.profile")
+if ENABLED and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_NULL = nullcontext()
+_local = threading.local()      # spany bieżącego reruna (Streamlit: wątek na sesję)
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+
+
+def record(key, seconds):
+    with _lock:
+        _samples[key].append(seconds)
+
+
+class Span:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        record(f"span/{self.name}", elapsed)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans[self.name] = spans.get(self.name, 0.0) + elapsed
+        return False
+
+def span(name):
+    return Span(name) if ENABLED else _NULL
+
+
+class Rerun:
+    # Cały przebieg skryptu; klucz rerun/<tryb>/<krok>. Wyjątki Streamlit (st.rerun) też są mierzone.
+    def __init__(self, mode, step):
+        self.mode = mode
+        self.step = step
+
+    def __enter__(self):
+        _local.spans = {}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        spans = _local.spans
+        _local.spans = None
+        record(f"rerun/{self.mode}/{self.step}", elapsed)
+        logger.info(json.dumps({
+            "mode": self.mode,
+            "step": self.step,
+            "total_ms": round(elapsed * 1000, 3),
+            "spans_ms": {name: round(s * 1000, 3) for name, s in spans.items()},
+        }, ensure_ascii=False))
+        return False
+
+def rerun(mode, step):
+    return Rerun(mode, step) if ENABLED else _NULL
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+def summary():
+    with _lock:
+        snapshot = {key: sorted(values) for key, values in _samples.items()}
+    return {
+        key: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+        }
+        for key, values in sorted(snapshot.items())
+    }
+
+def reset():
+    with _lock:
+        _samples.clear()
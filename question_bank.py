@@ -0,0 +1,322 @@
+import csv
+import hashlib
+import os
+import random
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+
+# ----------------------------------------------------------------------------------------------------------------
+# Bank pytań - wspólny dla wszystkich sesji, tylko do odczytu
+# ----------------------------------------------------------------------------------------------------------------
+
+CATEGORY_NAMES = (
+    "Śmieszne", "Światopoglądowe", "Związkowe", "Pikantne",
+    "Luźne", "Przeszłość", "Wolisz", "Dylematy"
+)
+FIELDS = ("id", "text", "category", "left", "right")
+QUESTION_CACHE = 4096   # ile pytań z SQLite trzymamy w pamięci
+
+
+def file_stamp(path):
+    # Zmiana pliku = zmiana (mtime, rozmiar) -> nowy bank
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def bank_stamp(*paths):
+    return tuple(file_stamp(p) if p and os.path.exists(p) else None for p in paths)
+
+
+class IndexedBank:
+    # Pytania posortowane po kategorii: każda kategoria to ciągły zakres indeksów.
+    # Pytanie i = bit i; zbiory pytań (kategoria, zużyte) jako int.
+    def set_ranges(self, category_names, counts):
+        ranges = {}
+        start = 0
+        for cat in category_names:
+            ranges[cat] = range(start, start + counts.get(cat, 0))
+            start = ranges[cat].stop
+        self.category_ranges = MappingProxyType(ranges)
+        self.category_masks = MappingProxyType({
+            cat: ((1 << r.stop) - 1) ^ ((1 << r.start) - 1) for cat, r in ranges.items()
+        })
+
+    @property
+    def categories(self):
+        return self.category_ranges
+
+    def remaining(self, category, used=0):
+        return (self.category_masks.get(category, 0) & ~used).bit_count()
+
+    # Bitset <-> id pytań (dziennik gier trzyma id, bo indeksy zmieniają się z wersją banku)
+    def ids(self, mask):
+        while mask:
+            low = mask & -mask
+            yield self.question(low.bit_length() - 1)["id"]
+            mask ^= low
+
+    def digest(self):
+        # sha256 id pytań w kolejności indeksów: ta sama suma = te same indeksy (checkpointy stolików)
+        digest = hashlib.sha256()
+        for question_id in self.ordered_ids():
+            digest.update(question_id.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def mask(self, ids):
+        mask = 0
+        for question_id in ids:
+            try:
+                mask |= 1 << self.index_of(question_id)
+            except KeyError:    # pytanie usunięte z banku
+                pass
+        return mask
+
+
+class QuestionBank(IndexedBank):
+    # Cały bank w pamięci (CSV)
+    def __init__(self, records, category_names):
+        order = {cat: i for i, cat in enumerate(category_names)}
+        records = sorted(records, key=lambda r: order.get(r["category"], len(order)))
+        self.questions = tuple(MappingProxyType({f: r[f] for f in FIELDS}) for r in records)
+        self.index_by_id = MappingProxyType({q["id"]: i for i, q in enumerate(self.questions)})
+        counts = {}
+        for q in self.questions:
+            counts[q["category"]] = counts.get(q["category"], 0) + 1
+        self.set_ranges(category_names, counts)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def question(self, index):
+        return self.questions[index]
+
+    def index_of(self, question_id):
+        return self.index_by_id[question_id]
+
+    def ordered_ids(self):
+        return (q["id"] for q in self.questions)
+
+
+class SQLiteQuestionBank(IndexedBank):
+    # Tabela (idx, id, category, ...) z indeksami - wiersze czytane dopiero przy losowaniu/eksporcie
+    def __init__(self, db_path, category_names):
+        self.db_path = db_path
+        self._local = threading.local()
+        rows = self.connection().execute(
+            "SELECT category, COUNT(*) FROM questions GROUP BY category"
+        ).fetchall()
+        self.size = sum(count for _, count in rows)
+        self.set_ranges(category_names, dict(rows))
+        self.question = lru_cache(maxsize=QUESTION_CACHE)(self._fetch)
+
+    def connection(self):
+        # sqlite3 nie dzieli połączeń między wątkami - jedno (tylko do odczytu) na wątek
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self.size
+
+    def _fetch(self, index):
+        row = self.connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM questions WHERE idx = ?", (index,)
+        ).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return MappingProxyType(dict(zip(FIELDS, row)))
+
+    def index_of(self, question_id):
+        row = self.connection().execute(
+            "SELECT idx FROM questions WHERE id = ?", (question_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(question_id)
+        return row[0]
+
+    def ordered_ids(self):
+        return (row[0] for row in self.connection().execute("SELECT id FROM questions ORDER BY idx"))
+
+
+def load_question_bank(path, category_names):
+    with open(path, newline="", encoding="utf-8") as f:
+        return QuestionBank(csv.DictReader(f, delimiter=";"), category_names)
+
+def build_sqlite(csv_path, db_path, category_names):
+    # Kolejność jak w QuestionBank: idx rośnie kategoriami, więc kategorie to ciągłe zakresy
+    source = load_question_bank(csv_path, category_names)
+    temp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    with sqlite3.connect(temp_path) as conn:
+        conn.execute(
+            "CREATE TABLE questions (idx INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+            "category TEXT NOT NULL, text TEXT NOT NULL, left TEXT, right TEXT)"
+        )
+        conn.execute("CREATE INDEX questions_category ON questions (category, idx)")
+        conn.executemany(
+            "INSERT INTO questions (idx, id, text, category, left, right) VALUES (?, ?, ?, ?, ?, ?)",
+            ((i, *(q[f] for f in FIELDS)) for i, q in enumerate(source.questions))
+        )
+    conn.close()
+    os.replace(temp_path, db_path)
+    return len(source)
+
+# ------------------------------
+# Artefakt binarny (questions.bin)
+# ------------------------------
+
+# Nagłówek | kategorie (u32, indeksy napisów) | kategoria pytania (u8) | id/text/left/right (4 x u32) | napisy
+# Napisy: każdy unikalny tylko raz, UTF-8 rozdzielone \0. Suma sha256 treści + sha256 źródłowego CSV.
+
+BIN_MAGIC = b"SPQB"
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct("<4sHIHI32s32s")   # magic, wersja, pytań, kategorii, bajtów napisów, sha treści, sha CSV
+BIN_FIELDS = ("id", "text", "left", "right")
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def source_digest(csv_path):
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def build_artifact(csv_path, bin_path, category_names):
+    source = load_question_bank(csv_path, category_names)
+    strings = {}
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    # Kategorie spoza listy też trafiają do pliku (jak w CSV), tylko nie dostają zakresu
+    categories = list(dict.fromkeys([*category_names, *(q["category"] for q in source.questions)]))
+    category_ids = array("I", (intern(cat) for cat in categories))
+    question_category = array("B", (categories.index(q["category"]) for q in source.questions))
+    fields = array("I", (intern(q[f]) for q in source.questions for f in BIN_FIELDS))
+    if any("\0" in value for value in strings):
+        raise ArtifactError("znak \\0 w treści pytania")
+    table = "\0".join(strings).encode("utf-8")
+
+    body = category_ids.tobytes() + question_category.tobytes() + fields.tobytes() + table
+    header = BIN_HEADER.pack(
+        BIN_MAGIC, BIN_VERSION, len(source), len(categories), len(table),
+        hashlib.sha256(body).digest(), source_digest(csv_path)
+    )
+    temp_path = f"{bin_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header + body)
+    os.replace(temp_path, bin_path)
+    return len(source)
+
+def load_artifact(bin_path, category_names, csv_path=None):
+    with open(bin_path, "rb") as f:
+        data = f.read()
+    if len(data) < BIN_HEADER.size:
+        raise ArtifactError("plik za krótki")
+    magic, version, count, n_categories, table_size, checksum, source = BIN_HEADER.unpack_from(data)
+    if magic != BIN_MAGIC or version != BIN_VERSION:
+        raise ArtifactError("nieznany format")
+    body = memoryview(data)[BIN_HEADER.size:]
+    if hashlib.sha256(body).digest() != checksum:
+        raise ArtifactError("zła suma kontrolna")
+    if csv_path and os.path.exists(csv_path) and source_digest(csv_path) != source:
+        raise ArtifactError("artefakt starszy niż CSV")
+
+    offset = 0
+    def take(typecode, length):
+        nonlocal offset
+        values = array(typecode)
+        values.frombytes(body[offset:offset + length * values.itemsize])
+        offset += length * values.itemsize
+        return values
+
+    category_ids = take("I", n_categories)
+    question_category = take("B", count)
+    fields = take("I", count * len(BIN_FIELDS))
+    if offset + table_size != len(body):
+        raise ArtifactError("zły rozmiar tabeli napisów")
+    strings = bytes(body[offset:]).decode("utf-8").split("\0")
+
+    categories = [strings[i] for i in category_ids]
+    width = len(BIN_FIELDS)
+    records = (
+        {
+            "id": strings[fields[i * width]],
+            "text": strings[fields[i * width + 1]],
+            "category": categories[question_category[i]],
+            "left": strings[fields[i * width + 2]],
+            "right": strings[fields[i * width + 3]],
+        }
+        for i in range(count)
+    )
+    return QuestionBank(records, category_names)
+
+def open_question_bank(csv_path, category_names, db_path=None, bin_path=None):
+    # Kolejność: SQLite (nie starsza niż CSV) -> artefakt binarny (zgodny z CSV) -> CSV
+    if db_path and os.path.exists(db_path):
+        if not os.path.exists(csv_path) or os.path.getmtime(db_path) >= os.path.getmtime(csv_path):
+            return SQLiteQuestionBank(db_path, category_names)
+    if bin_path and os.path.exists(bin_path):
+        try:
+            return load_artifact(bin_path, category_names, csv_path)
+        except (ArtifactError, ValueError, struct.error):
+            pass
+    return load_question_bank(csv_path, category_names)
+
+
+# ------------------------------
+# Talia pytań jednej gry
+# ------------------------------
+
+class QuestionDeck:
+    # Rzadki Fisher-Yates po pozycjach wybranych kategorii: losowanie bez powtórzeń w O(1),
+    # pamięć rośnie z liczbą wylosowanych pytań, nie z rozmiarem banku. Zużyte pytania jako bitset.
+    def __init__(self, bank, categories, used=0, rng=None):
+        self.rng = rng or random.Random()
+        self.bank = bank
+        self.used = used
+        # Kolejność kategorii z banku, nie z wyboru (zbiór) - to samo ziarno = te same pytania
+        self.categories = [cat for cat in bank.category_ranges if cat in categories]
+        self.ranges = [bank.category_ranges[cat] for cat in self.categories]
+        self.size = sum(len(r) for r in self.ranges)
+        self.swaps = {}
+        self.cursor = 0
+
+    def index_at(self, position):
+        for r in self.ranges:
+            if position < len(r):
+                return r[position]
+            position -= len(r)
+        raise IndexError(position)
+
+    def draw(self):
+        while self.cursor < self.size:
+            j = self.rng.randrange(self.cursor, self.size)
+            position = self.swaps.pop(j, j)
+            if j != self.cursor:
+                self.swaps[j] = self.swaps.pop(self.cursor, self.cursor)
+            self.cursor += 1
+            index = self.index_at(position)
+            if not self.used & (1 << index):
+                self.used |= 1 << index
+                return self.bank.question(index)
+        return None
+
+    def remaining(self, category=None):
+        if category is None:
+            return sum(self.bank.remaining(cat, self.used) for cat in self.categories)
+        return self.bank.remaining(category, self.used)
+
+
+if __name__ == "__main__":
+    # python question_bank.py questions.csv questions.bin   (albo questions.db)
+    csv_path, out_path = sys.argv[1:3]
+    build = build_sqlite if out_path.endswith(".db") else build_artifact
+    print(f"{out_path}: {build(csv_path, out_path, CATEGORY_NAMES)} pytań")
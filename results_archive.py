@@ -0,0 +1,242 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from round_log import COLUMNS
+
+# ----------------------------------------------------------------------------------------------------------------
+# Archiwum wyników: pliki wyniki/RRRR-MM-DD_graNNN.xlsx -> jedna tabela SQLite do analiz
+#
+#   python results_archive.py ingest [wyniki] [--db wyniki.db] [--workers N]
+#   python results_archive.py kategorie [--db wyniki.db]
+#
+# Przyrostowo: plik o niezmienionym (mtime, rozmiar) nie jest czytany ponownie. Nowe pliki parsowane
+# równolegle w puli procesów (openpyxl read_only). Wszystkie układy kolumn sprowadzane do układu
+# RoundEvent z round_log (ten sam, który zapisuje dzisiejszy eksport).
+# ----------------------------------------------------------------------------------------------------------------
+
+ARCHIVE_DB = os.environ.get("SPECTRUM_ARCHIVE_DB", "wyniki.db")
+RESULTS_DIR = "wyniki"
+FILE_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})_gra(\d+)\.xlsx$")
+PARSE_CHUNK = 8         # plików na jedno zadanie w puli
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    layout TEXT,
+    rows INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    file TEXT NOT NULL,
+    day TEXT NOT NULL,
+    game INTEGER NOT NULL,
+    runda INTEGER,
+    nr_pytania INTEGER,
+    tryb TEXT NOT NULL,
+    kategoria TEXT,
+    id_pytania TEXT,
+    pytanie TEXT,
+    odpowiada TEXT,
+    zgaduje TEXT,
+    kierunek TEXT,
+    punkty_odpowiada INTEGER,
+    punkty_zgaduje INTEGER,
+    punkty_kierunek INTEGER
+);
+CREATE INDEX IF NOT EXISTS rounds_file ON rounds (file);
+CREATE INDEX IF NOT EXISTS rounds_category ON rounds (kategoria, punkty_zgaduje, punkty_odpowiada);
+"""
+
+ROUND_COLUMNS = ("file", "day", "game") + COLUMNS
+
+
+class ArchiveError(Exception):
+    pass
+
+
+# ------------------------------
+# Układy kolumn
+# ------------------------------
+
+# Dzisiejszy eksport (round_log.COLUMNS) i trzy starsze, po jednym na tryb. W starszych punkty gracza/drużyny
+# są w kolumnie nazwanej jego imieniem; "runda" nie we wszystkich wersjach 2-osobowego.
+# Rozpoznanie po stałych kolumnach trybu (numer pytania pod różnymi nazwami) - gracz może nazywać się
+# jak dowolna kolumna, więc pojedyncza nazwa nie przesądza o układzie.
+
+def detect_layout(header):
+    columns = set(header)
+    if "pytanie_nr" in columns and "zgaduje_drużyna" in columns:
+        return "Drużynowy"
+    if "nr_pytania" in columns:
+        if "tryb" in columns and "id_pytania" in columns:
+            return "zdarzenia"
+        if "odpowiada" in columns and "zgaduje" in columns:
+            return "3-osobowy" if "dodatkowo" in columns else "2-osobowy"
+    raise ArchiveError(f"nieznany układ kolumn: {header}")
+
+def points(row, name):
+    value = row.get(name) if name is not None else None
+    return int(value) if value is not None else 0
+
+def normalize(layout, row):
+    # Wiersz pliku (dict po nagłówku) -> krotka w kolejności COLUMNS
+    if layout == "zdarzenia":
+        return tuple(row.get(column) for column in COLUMNS)
+
+    if layout == "Drużynowy":
+        responder, guesser, director = row["odpowiada"], row["zgaduje_drużyna"], row["kierunek_drużyna"]
+        number = row.get("pytanie_nr")
+        responder_points = points(row, "punkty_za_odpowiedź")
+    else:
+        responder, guesser = row["odpowiada"], row["zgaduje"]
+        director = row.get("dodatkowo")
+        number = row.get("nr_pytania")
+        responder_points = points(row, responder)
+    return (
+        row.get("runda"), number, layout, row.get("kategoria"), None, row.get("pytanie"),
+        responder, guesser, director, responder_points, points(row, guesser), points(row, director),
+    )
+
+
+def parse_file(path):
+    # Wykonywane w procesie z puli: (nazwa, układ, wiersze, błąd)
+    import openpyxl
+
+    name = os.path.basename(path)
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            layout = detect_layout(header)
+            parsed = [
+                normalize(layout, dict(zip(header, values)))
+                for values in rows if any(v is not None for v in values)
+            ]
+        finally:
+            workbook.close()
+    except Exception as e:
+        return name, None, [], f"{type(e).__name__}: {e}"
+    return name, layout, parsed, None
+
+def parse_files(paths, workers=None):
+    if len(paths) <= 1 or workers == 1:
+        yield from map(parse_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_file, paths, chunksize=PARSE_CHUNK)
+
+
+# ------------------------------
+# Magazyn (SQLite)
+# ------------------------------
+
+def connect(db_path=ARCHIVE_DB):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# Cudzysłowy/apostrofy typograficzne -> proste (edycje CSV w różnych edytorach)
+QUOTES = str.maketrans({"„": '"', "”": '"', "“": '"', "»": '"', "«": '"', "’": "'", "‘": "'"})
+
+def text_key(text):
+    # Treść pytania do dopasowania: bez różnic w białych znakach, wielkości liter i cudzysłowach
+    if not isinstance(text, str):
+        return None
+    return " ".join(text.translate(QUOTES).split()).casefold()
+
+def question_ids():
+    # Starsze pliki nie mają id pytania - dopasowanie po treści z bieżącym bankiem
+    from question_bank import CATEGORY_NAMES, open_question_bank
+
+    try:
+        bank = open_question_bank("questions.csv", CATEGORY_NAMES, None, "questions.bin")
+    except OSError:
+        return {}
+    return {text_key(q["text"]): q["id"] for q in map(bank.question, range(len(bank)))}
+
+def archive_files(results_dir):
+    # {nazwa: (ścieżka, mtime_ns, rozmiar)} dla plików z poprawną nazwą
+    files = {}
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and FILE_NAME.match(entry.name):
+                stat = entry.stat()
+                files[entry.name] = (entry.path, stat.st_mtime_ns, stat.st_size)
+    return files
+
+def ingest(results_dir=RESULTS_DIR, db_path=ARCHIVE_DB, workers=None):
+    conn = connect(db_path)
+    known = {name: (mtime, size) for name, mtime, size in conn.execute("SELECT name, mtime_ns, size FROM files")}
+    files = archive_files(results_dir)
+
+    changed = sorted(name for name, (_, mtime, size) in files.items() if known.get(name) != (mtime, size))
+    removed = [name for name in known if name not in files]
+    stats = {"files": len(files), "parsed": len(changed), "removed": len(removed), "rows": 0, "errors": 0,
+             "unmatched": 0}
+    if not changed and not removed:
+        conn.close()
+        return stats
+
+    ids = question_ids() if changed else {}
+    with conn:
+        for name in removed:
+            conn.execute("DELETE FROM rounds WHERE file = ?", (name,))
+            conn.execute("DELETE FROM files WHERE name = ?", (name,))
+        for name, layout, rows, error in parse_files([files[n][0] for n in changed], workers):
+            day, game = FILE_NAME.match(name).groups()
+            _, mtime, size = files[name]
+            rows = [(*row[:4], row[4] or ids.get(text_key(row[5])), *row[5:]) for row in rows]
+            conn.execute("DELETE FROM rounds WHERE file = ?", (name,))
+            conn.executemany(
+                f"INSERT INTO rounds ({', '.join(ROUND_COLUMNS)}) VALUES ({', '.join('?' * len(ROUND_COLUMNS))})",
+                ((name, day, int(game), *row) for row in rows)
+            )
+            # Plik z błędem też zapisany - nie jest czytany ponownie, dopóki się nie zmieni
+            conn.execute(
+                "INSERT OR REPLACE INTO files (name, mtime_ns, size, layout, rows, error) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, mtime, size, layout, len(rows), error)
+            )
+            stats["rows"] += len(rows)
+            stats["errors"] += error is not None
+            # Pytania bez id (tekst nie pasuje do żadnego z bieżącego banku) - zostają z NULL w id_pytania
+            stats["unmatched"] += sum(row[4] is None for row in rows)
+    conn.close()
+    return stats
+
+def category_stats(db_path=ARCHIVE_DB):
+    # Które kategorie punktują najlepiej: średnio punktów zgadującego i odpowiadającego na pytanie
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT kategoria, COUNT(*), AVG(punkty_zgaduje), AVG(punkty_odpowiada) FROM rounds "
+            "WHERE kategoria IS NOT NULL GROUP BY kategoria ORDER BY AVG(punkty_zgaduje) DESC"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archiwum wyników gier")
+    parser.add_argument("command", choices=("ingest", "kategorie"))
+    parser.add_argument("results_dir", nargs="?", default=RESULTS_DIR)
+    parser.add_argument("--db", default=ARCHIVE_DB)
+    parser.add_argument("--workers", type=int, default=None, help="procesów w puli (domyślnie liczba CPU)")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        start = time.perf_counter()
+        s = ingest(args.results_dir, args.db, args.workers)
+        print(f"plików {s['files']}: wczytano {s['parsed']} ({s['rows']} wierszy, bez id pytania {s['unmatched']}, "
+              f"błędów {s['errors']}), usunięto {s['removed']} | {time.perf_counter() - start:.2f} s")
+        sys.exit(1 if s["errors"] else 0)
+    for category, count, guesser, responder in category_stats(args.db):
+        print(f"{category:16} pytań {count:5} | zgadujący {guesser:4.2f} | odpowiadający {responder:4.2f}")
@@ -0,0 +1,126 @@
+import csv
+import importlib.util
+import io
+import json
+import tempfile
+from itertools import islice
+
+import profiling
+from round_log import COLUMNS
+
+# ----------------------------------------------------------------------------------------------------------------
+# Eksport wyników gry - XLSX / CSV / JSONL / Parquet z listy RoundEvent
+# Writery oddają plik kawałkami, co ogranicza tylko bufory pośrednie (CSV/JSONL piszą partiami po CHUNK_ROWS,
+# XLSX i Parquet - format z katalogiem na końcu pliku - przez plik tymczasowy, który dopiero powyżej
+# SPOOL_BYTES ląduje na dysku). export() skleja kawałki: gotowy plik powstaje w pamięci w całości.
+# ----------------------------------------------------------------------------------------------------------------
+
+# format -> (etykieta, rozszerzenie, typ MIME)
+FORMATS = {
+    "xlsx": ("XLSX", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "csv", "text/csv"),
+    "jsonl": ("JSONL", "jsonl", "application/x-ndjson"),
+}
+# Parquet tylko gdy pyarrow jest zainstalowany (sprawdzenie bez importu)
+if importlib.util.find_spec("pyarrow") is not None:
+    FORMATS["parquet"] = ("Parquet", "parquet", "application/vnd.apache.parquet")
+
+SHEET_NAME = "Wyniki"
+# Ten sam nagłówek co pandas.to_excel
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+CHUNK_ROWS = 256            # zdarzeń na kawałek
+CHUNK_BYTES = 64 * 1024     # kawałki plików XLSX/Parquet
+SPOOL_BYTES = 1024 * 1024   # do tylu bajtów plik tymczasowy zostaje w pamięci
+
+
+def batched(events, size=CHUNK_ROWS):
+    events = iter(events)
+    while batch := list(islice(events, size)):
+        yield batch
+
+def spooled():
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+
+def read_chunks(f):
+    f.seek(0)
+    yield from iter(lambda: f.read(CHUNK_BYTES), b"")
+
+
+def csv_chunks(events):
+    output = io.StringIO(newline="")
+    writer = csv.writer(output, delimiter=";")
+    # BOM - Excel inaczej psuje polskie znaki
+    output.write("\ufeff")
+    writer.writerow(COLUMNS)
+    for batch in batched(events):
+        writer.writerows(batch)
+        yield output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate()
+    if output.tell():   # gra bez zapisanych pytań - sam nagłówek
+        yield output.getvalue().encode("utf-8")
+
+
+def jsonl_chunks(events):
+    for batch in batched(events):
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, event)), ensure_ascii=False) + "\n" for event in batch
+        ).encode("utf-8")
+
+
+# Biblioteki formatów importowane przy pierwszym eksporcie, nie przy starcie aplikacji
+
+def xlsx_chunks(events):
+    import xlsxwriter
+
+    with spooled() as output:
+        # constant_memory: wiersze idą od razu do pliku tymczasowego, pamięć nie rośnie z długością gry
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+        sheet = workbook.add_worksheet(SHEET_NAME)
+        sheet.write_row(0, 0, COLUMNS, workbook.add_format(HEADER_FORMAT))
+        for r, event in enumerate(events, start=1):
+            sheet.write_row(r, 0, event)
+        workbook.close()
+        yield from read_chunks(output)
+
+
+def parquet_chunks(events):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("runda", pa.int16()), ("nr_pytania", pa.int16()), ("tryb", pa.string()), ("kategoria", pa.string()),
+        ("id_pytania", pa.string()), ("pytanie", pa.string()), ("odpowiada", pa.string()),
+        ("zgaduje", pa.string()), ("kierunek", pa.string()), ("punkty_odpowiada", pa.int8()),
+        ("punkty_zgaduje", pa.int8()), ("punkty_kierunek", pa.int8()),
+    ])
+    with spooled() as output:
+        with pq.ParquetWriter(output, schema) as writer:
+            for batch in batched(events):
+                columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+        yield from read_chunks(output)
+
+
+WRITERS = {
+    "xlsx": xlsx_chunks,
+    "csv": csv_chunks,
+    "jsonl": jsonl_chunks,
+    "parquet": parquet_chunks,
+}
+
+def chunks(events, fmt="xlsx"):
+    return WRITERS[fmt](events)
+
+def export(events, fmt="xlsx"):
+    return b"".join(chunks(events, fmt))
+
+def deferred_export(log, fmt="xlsx"):
+    # data= dla st.download_button: plik budowany dopiero po kliknięciu "Pobierz" (poza rerunem), w całości
+    # w pamięci na czas pobrania - nic nie czeka w sesji. Streamlit przyjmuje z callable tylko
+    # str/bytes/BytesIO/..., więc bytes, bez przesyłania kawałkami.
+    def build():
+        with profiling.span(f"export_{fmt}"):
+            return export(log.events(), fmt)
+    return build
@@ -0,0 +1,88 @@
+from array import array
+from typing import NamedTuple, Optional
+
+# ----------------------------------------------------------------------------------------------------------------
+# Log rund jednej gry - kolumny typowane (array), tekst pytania tylko przy eksporcie
+# ----------------------------------------------------------------------------------------------------------------
+
+NO_PLAYER = -1
+
+# Jedno zdarzenie = jedno zapisane pytanie, ten sam układ we wszystkich trybach.
+# kierunek: 3-osobowy - trzeci gracz, Drużynowy - drużyna przeciwna, 2-osobowy - brak (None, 0 pkt)
+class RoundEvent(NamedTuple):
+    round: int
+    number: int
+    mode: str
+    category: str
+    question_id: str
+    question: str
+    responder: str
+    guesser: str
+    director: Optional[str]
+    responder_points: int
+    guesser_points: int
+    director_points: int
+
+# Nagłówki plików wyników, w kolejności pól RoundEvent
+COLUMNS = ("runda", "nr_pytania", "tryb", "kategoria", "id_pytania", "pytanie", "odpowiada", "zgaduje",
+           "kierunek", "punkty_odpowiada", "punkty_zgaduje", "punkty_kierunek")
+
+
+class RoundLog:
+    # Tylko dopisywanie: jeden wiersz na pytanie. Gracze/drużyny jako indeksy w self.names.
+    def __init__(self, bank, mode):
+        self.bank = bank
+        self.mode = mode
+        self.names = []
+        self._name_ids = {}
+        self.round = array("H")
+        self.number = array("H")
+        self.question = array("I")       # indeks pytania w banku
+        self.responder = array("b")
+        self.guesser = array("b")
+        self.director = array("b")       # NO_PLAYER w trybie 2-osobowym
+        self.responder_points = array("b")
+        self.guesser_points = array("b")
+        self.director_points = array("b")
+
+    def __len__(self):
+        return len(self.question)
+
+    def name_id(self, name):
+        if name is None:
+            return NO_PLAYER
+        if name not in self._name_ids:
+            self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return self._name_ids[name]
+
+    def append(self, round_no, number, question, responder, guesser, responder_points, guesser_points,
+               director=None, director_points=0):
+        self.round.append(round_no)
+        self.number.append(number)
+        self.question.append(self.bank.index_of(question["id"]))
+        self.responder.append(self.name_id(responder))
+        self.guesser.append(self.name_id(guesser))
+        self.director.append(self.name_id(director))
+        self.responder_points.append(responder_points)
+        self.guesser_points.append(guesser_points)
+        self.director_points.append(director_points)
+
+    def record(self, i):
+        # Wiersz i w kolejności argumentów append(), pytanie po id - do dziennika gier
+        director = self.names[self.director[i]] if self.director[i] != NO_PLAYER else None
+        return (self.round[i], self.number[i], self.bank.question(self.question[i])["id"],
+                self.names[self.responder[i]], self.names[self.guesser[i]],
+                self.responder_points[i], self.guesser_points[i], director, self.director_points[i])
+
+    def events(self, start=0):
+        # Strumień zdarzeń od wiersza start - eksport czyta go kawałkami, nic nie jest budowane w całości
+        names = self.names
+        for i in range(start, len(self)):
+            q = self.bank.question(self.question[i])
+            director = names[self.director[i]] if self.director[i] != NO_PLAYER else None
+            yield RoundEvent(
+                self.round[i], self.number[i], self.mode, q["category"], q["id"], q["text"],
+                names[self.responder[i]], names[self.guesser[i]], director,
+                self.responder_points[i], self.guesser_points[i], self.director_points[i],
+            )
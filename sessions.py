@@ -0,0 +1,288 @@
+import hashlib
+import hmac
+import io
+import logging
+import os
+import pickle
+import re
+import secrets
+import sys
+import threading
+import time
+from types import MappingProxyType, ModuleType
+
+# ----------------------------------------------------------------------------------------------------------------
+# Rejestr stolików (gier) w procesie: checkpointy stanu na dysku, rozmiar stanu każdego stolika w pamięci,
+# usypianie bezczynnych i odtwarzanie gry, gdy stolik wróci (?table=...&key=... albo "Wróć do gry").
+#
+# Rejestr nie dotyka stanu sesji - wszystko wywoływane jest z sesji, która gra przy stoliku, i dostaje
+# zwykły słownik (st.session_state.to_dict()). Bezczynną sesję usypia jej własny fragment (checkpoint,
+# wyczyszczony stan, park()); pamięć zamkniętej karty zwalnia sam Streamlit, a sweep() zapomina jej wpis.
+#
+#   SPECTRUM_SESSION_TTL=1800    po ilu sekundach bezczynności stolik zasypia
+#   SPECTRUM_SESSION_DIR=sesje   katalog checkpointów
+# ----------------------------------------------------------------------------------------------------------------
+
+SESSION_DIR = os.environ.get("SPECTRUM_SESSION_DIR", "sesje")
+IDLE_TTL = float(os.environ.get("SPECTRUM_SESSION_TTL", 30 * 60))
+SWEEP_INTERVAL = 30     # co ile sekund (najczęściej) sprawdzamy bezczynność
+CHECKPOINT_EVERY = 30   # sekundy - zapis także bez zmiany kroku gry (np. wpisywanie graczy)
+CHECKPOINT_DAYS = 7     # starsze checkpointy nikt już nie odtworzy
+
+TABLE_ID = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+OWNER_KEY = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+logger = logging.getLogger("spectrum.sessions")
+
+
+def new_table_id():
+    return secrets.token_urlsafe(8)
+
+def new_owner_key():
+    # Sekret właściciela stolika - bez niego ?table=... nie odtworzy gry
+    return secrets.token_urlsafe(16)
+
+def owner_hash(key):
+    # Na dysku i w dzienniku tylko skrót klucza
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def valid_owner_key(key):
+    return isinstance(key, str) and OWNER_KEY.match(key) is not None
+
+def owner_matches(key, stored_hash):
+    return valid_owner_key(key) and stored_hash is not None and hmac.compare_digest(owner_hash(key), stored_hash)
+
+def valid_table_id(table_id):
+    return isinstance(table_id, str) and TABLE_ID.match(table_id) is not None
+
+def state_size(values, shared=()):
+    # Przybliżony rozmiar stanu w pamięci (sys.getsizeof po całym grafie obiektów); obiekty wspólne
+    # dla wszystkich sesji - bank (shared) i pytania z niego - nie są liczone
+    seen = {id(obj) for obj in shared}
+    stack = list(values.values())
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, MappingProxyType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return size
+
+
+# Bank pytań nie trafia do checkpointu: talia i log rund dostają przy odtwarzaniu bieżący bank,
+# pytania (niemutowalne widoki z banku) zapisywane są jako indeks w banku
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, bank):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.bank = bank
+
+    def persistent_id(self, obj):
+        if obj is self.bank:
+            return "bank"
+        if isinstance(obj, MappingProxyType) and "id" in obj:
+            return ("question", self.bank.index_of(obj["id"]))
+        return None
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, bank):
+        super().__init__(file)
+        self.bank = bank
+
+    def persistent_load(self, pid):
+        if pid == "bank":
+            return self.bank
+        if isinstance(pid, tuple) and pid[0] == "question":
+            return self.bank.question(pid[1])
+        raise pickle.UnpicklingError(f"nieznany obiekt {pid!r}")
+
+
+class LiveTable:
+    def __init__(self, lease):
+        self.lease = lease      # która sesja gra przy stoliku (nowa karta z kluczem przejmuje stolik)
+        self.last_seen = time.monotonic()
+        self.saved_at = 0.0
+        self.bytes = 0          # rozmiar stanu sesji w pamięci przy ostatnim checkpoincie
+
+
+class Registry:
+    def __init__(self, bank, stamp, transient=(), directory=SESSION_DIR, ttl=IDLE_TTL):
+        self.bank = bank
+        self.stamp = stamp              # skrót treści banku: inny bank = inne indeksy pytań
+        self.transient = tuple(transient)   # klucze/prefiksy kluczy pomijane w checkpoincie
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._last_sweep = time.monotonic()
+        self.evicted = 0        # uśpione (stan sesji zwolniony)
+        self.dropped = 0        # zapomniane wpisy zamkniętych kart
+        self.restored = 0
+
+    def path(self, table_id):
+        return os.path.join(self.directory, f"{table_id}.pkl")
+
+    # Checkpoint = dwa pickle po kolei: nagłówek (bez banku) i stan; nagłówek da się przeczytać sam
+    def dump(self, header, values):
+        persisted = {key: value for key, value in values.items() if not key.startswith(self.transient)}
+        buffer = io.BytesIO()
+        pickle.dump(header, buffer, pickle.HIGHEST_PROTOCOL)
+        _Pickler(buffer, self.bank).dump(persisted)
+        return buffer.getvalue()
+
+    def header(self, table_id):
+        try:
+            with open(self.path(table_id), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    # --- wywoływane z reruna stolika ---
+
+    def touch(self, table_id, lease):
+        # False: stolik przejęła inna sesja (nowsza karta z tym samym kluczem)
+        now = time.monotonic()
+        with self._lock:
+            table = self._tables.get(table_id)
+        if table is None:
+            # Pierwszy rerun albo powrót po wypadnięciu z rejestru - aktualny właściciel jest w checkpoincie
+            try:
+                header = self.header(table_id)
+            except Exception:
+                header = None
+            if header is not None and header.get("lease") not in (None, lease):
+                return False
+            with self._lock:
+                table = self._tables.setdefault(table_id, LiveTable(lease))
+        if table.lease != lease:
+            return False
+        with self._lock:
+            table.last_seen = now
+            sweep = now - self._last_sweep >= SWEEP_INTERVAL
+            if sweep:
+                self._last_sweep = now
+        if sweep:
+            self.sweep(now)
+        return True
+
+    def claim(self, table_id, lease):
+        with self._lock:
+            self._tables[table_id] = LiveTable(lease)
+
+    def holds(self, table_id, lease):
+        with self._lock:
+            table = self._tables.get(table_id)
+            return table is not None and table.lease == lease
+
+    def due(self, table_id):
+        with self._lock:
+            table = self._tables.get(table_id)
+            return table is not None and time.monotonic() - table.saved_at >= CHECKPOINT_EVERY
+
+    def save(self, table_id, lease, owner, values):
+        # values: zwykły słownik ze stanu tej sesji; owner: skrót klucza właściciela
+        held = state_size(values, (self.bank,))
+        data = self.dump({"stamp": self.stamp, "saved": time.time(), "owner": owner, "lease": lease}, values)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_file = os.path.join(self.directory, f".{table_id}.{threading.get_ident()}.tmp")
+        with open(temp_file, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path(table_id))
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is not None and table.lease == lease:
+                table.saved_at = time.monotonic()
+                table.bytes = held
+
+    def restore(self, table_id, key):
+        # Słownik stanu z checkpointu albo None (brak, zły klucz, inna wersja banku)
+        try:
+            with open(self.path(table_id), "rb") as f:
+                header = pickle.load(f)
+                if not owner_matches(key, header.get("owner")):
+                    logger.warning("Checkpoint %s: zły klucz właściciela", table_id)
+                    return None
+                if header.get("stamp") != self.stamp:
+                    logger.warning("Checkpoint %s z innej wersji banku pytań - pomijam", table_id)
+                    return None
+                values = _Unpickler(f, self.bank).load()
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Nie udało się odczytać checkpointu %s", table_id)
+            return None
+        with self._lock:
+            self.restored += 1
+        return values
+
+    def is_live(self, table_id):
+        with self._lock:
+            return table_id in self._tables
+
+    def forget(self, table_id):
+        if table_id is None:
+            return
+        with self._lock:
+            self._tables.pop(table_id, None)
+        try:
+            os.remove(self.path(table_id))
+        except FileNotFoundError:
+            pass
+
+    # --- bezczynne stoliki ---
+
+    def park(self, table_id, lease):
+        # Sesja uśpiła stolik po zapisaniu checkpointu i wyczyści swój stan; gra wraca przez restore()
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is None or table.lease != lease:
+                return False
+            del self._tables[table_id]
+            self.evicted += 1
+        return True
+
+    def sweep(self, now=None):
+        # Wpisy sesji, które nie uśpiły się same (zamknięta karta - fragment już nie działa), i stare pliki
+        now = time.monotonic() if now is None else now
+        limit = self.ttl + 2 * SWEEP_INTERVAL
+        with self._lock:
+            idle = [table_id for table_id, t in self._tables.items() if now - t.last_seen > limit]
+            for table_id in idle:
+                del self._tables[table_id]
+            self.dropped += len(idle)
+        self.prune()
+        return len(idle)
+
+    def prune(self):
+        cutoff = time.time() - CHECKPOINT_DAYS * 86400
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.endswith(".pkl") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    def stats(self):
+        with self._lock:
+            live = len(self._tables)
+            held = sum(t.bytes for t in self._tables.values())
+            evicted, dropped, restored = self.evicted, self.dropped, self.restored
+        try:
+            on_disk = sum(1 for n in os.listdir(self.directory) if n.endswith(".pkl"))
+        except FileNotFoundError:
+            on_disk = 0
+        return {"live": live, "bytes": held, "evicted": evicted, "dropped": dropped, "restored": restored,
+                "on_disk": on_disk}
@@ -1,14 +1,17 @@
 import streamlit as st
-import random
-import pandas as pd
 import csv
 import os
 import io
-import base64
-import requests
-from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
+import random
+import sys
+import time
+import board
+import journal
+import profiling
+import results_export
+import sessions
+from round_log import RoundLog
+from question_bank import CATEGORY_NAMES, QuestionDeck, bank_stamp, open_question_bank
 
 # ----------------------------------------------------------------------------------------------------------------
 # Funkcje
@@ -18,17 +21,23 @@ import numpy as np
 # Wczytywanie pytań z CSV
 # ------------------------------
 
-df = pd.read_csv('questions.csv', sep=';')
+QUESTIONS_DB = os.environ.get("SPECTRUM_QUESTIONS_DB", "questions.db")
+QUESTIONS_BIN = "questions.bin"
 
-def filter_by_category(cat):
-    return df[df['category'] == cat].to_dict(orient='records')
+# Jeden bank na cały proces - wczytywany ponownie tylko gdy plik się zmieni.
+# Pierwszeństwo: baza SQLite, potem artefakt binarny, na końcu sam CSV. Po edycji CSV:
+#   python question_bank.py questions.csv questions.bin
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_bank(path, db_path, bin_path, stamp):
+    with profiling.span("bank_load"):
+        return open_question_bank(path, CATEGORY_NAMES, db_path, bin_path)
 
-category_names = [
-    "Śmieszne", "Światopoglądowe", "Związkowe", "Pikantne",
-    "Luźne", "Przeszłość", "Wolisz", "Dylematy"
-]
+def get_question_bank(path="questions.csv", db_path=QUESTIONS_DB, bin_path=QUESTIONS_BIN):
+    return load_bank(path, db_path, bin_path, bank_stamp(path, db_path, bin_path))
 
-CATEGORIES = {cat: filter_by_category(cat) for cat in category_names}
+BANK_STAMP = bank_stamp("questions.csv", QUESTIONS_DB, QUESTIONS_BIN)
+bank = get_question_bank()
+CATEGORIES = bank.categories
 
 CATEGORY_EMOJIS = {
     "Śmieszne": "😂", "Światopoglądowe": "🌍", "Związkowe": "❤️", "Pikantne": "🌶️",
@@ -54,14 +63,13 @@ def init_session_state(defaults: dict):
 def get_default_session_state(mode):
     common_defaults = {
         "chosen_categories": [],
-        "used_ids": set(),
+        "used_questions": 0,    # bitset: bit i = pytanie i z banku
         "current_question": None,
         "scores": {},
         "step": "setup",
         "questions_asked": 0,
         "ask_continue": False,
         "guesser_points": None,
-        "results_data": []
     }
 
     if mode == "2-osobowy":
@@ -82,23 +90,311 @@ def new_state(state, value = None):
     if state not in st.session_state:
         st.session_state[state] = value
 
+# ------------------------------
+# Stoliki - rejestr sesji
+# ------------------------------
+
+# Nie trafiają do checkpointu: zadanie uploadu (odtwarzalne), dzierżawa stolika i czas ostatniej akcji
+# (każda sesja ma własne), klucz właściciela (na dysku tylko jego skrót, wraca z adresu) oraz klucze
+# przycisków, których stanu Streamlit nie pozwala ustawić
+TRANSIENT_KEYS = ("upload_job", "table_lease", "table_seen", "table_key", "cat_", "gp_", "ep_", "add_player_",
+                  "resume_")
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_registry(_bank, stamp):
+    # stamp (pliki banku) tylko jako klucz cache; checkpointy znakowane skrótem treści banku
+    return sessions.Registry(_bank, _bank.digest(), TRANSIENT_KEYS)
+
+def table_registry():
+    return load_registry(bank, BANK_STAMP)
+
+def leave_table():
+    # Stolik przejęła inna karta (albo nie da się go odtworzyć) - ta sesja wraca do wyboru trybu
+    st.query_params.pop("table", None)
+    st.query_params.pop("key", None)
+    st.session_state.clear()
+
+def attach_table():
+    # Nowa sesja z ?table=...&key=... (odświeżona karta, inne urządzenie, restart serwera) - odtworzenie
+    # z checkpointu. Bez checkpointu gra z dziennika czeka na ekranie wznowienia. Klucz właściciela musi pasować.
+    registry = table_registry()
+    if st.session_state.get("step") == "parked":
+        return None     # uśpiony stolik wraca dopiero przyciskiem
+    if "table_id" in st.session_state:
+        table_id = st.session_state.table_id
+        if registry.touch(table_id, st.session_state.table_lease):
+            st.session_state.table_seen = time.time()
+            return table_id
+        leave_table()
+        return None
+
+    table_id = st.query_params.get("table")
+    key = st.query_params.get("key")
+    if not sessions.valid_table_id(table_id):
+        return None
+    if not sessions.valid_owner_key(key):
+        leave_table()
+        return None
+    values = registry.restore(table_id, key)
+    if values is None:
+        if game_journal().pending(table_id, sessions.owner_hash(key)) is None:
+            leave_table()
+        return None
+    for name, value in values.items():
+        st.session_state[name] = value
+    adopt_table(table_id, key)
+    return table_id
+
+def adopt_table(table_id, key):
+    # Ta sesja gra teraz przy stoliku: nowa dzierżawa, checkpoint z nią na końcu reruna
+    st.session_state.table_id = table_id
+    st.session_state.table_key = key
+    st.session_state.table_lease = sessions.new_table_id()
+    st.session_state.table_seen = time.time()
+    st.session_state.pop("checkpoint_mark", None)
+    table_registry().claim(table_id, st.session_state.table_lease)
+
+def checkpoint_table(table_id):
+    # Na końcu reruna: checkpoint przy zmianie kroku/postępu gry albo co CHECKPOINT_EVERY sekund
+    if table_id is None or st.session_state.get("table_id") != table_id:
+        return
+    mark = (st.session_state.get("step"), st.session_state.get("questions_asked"),
+            st.session_state.get("ask_continue"))
+    registry = table_registry()
+    if mark == st.session_state.get("checkpoint_mark") and not registry.due(table_id):
+        return
+    st.session_state.checkpoint_mark = mark
+    save_checkpoint(table_id)
+
+def save_checkpoint(table_id):
+    with profiling.span("table_checkpoint"):
+        table_registry().save(table_id, st.session_state.table_lease,
+                              sessions.owner_hash(st.session_state.table_key), st.session_state.to_dict())
+
+def park_table():
+    # Bezczynna sesja: gra do checkpointu, stan sesji zwolniony; wraca przyciskiem albo z adresu w nowej karcie
+    table_id = st.session_state.table_id
+    registry = table_registry()
+    if not registry.holds(table_id, st.session_state.table_lease):
+        leave_table()   # stolik gra już w innej karcie
+        return
+    save_checkpoint(table_id)
+    registry.park(table_id, st.session_state.table_lease)
+    st.session_state.clear()
+    st.session_state.step = "parked"
+    st.session_state.mode = "None"
+
+def wake_table():
+    # Pusty stan + ?table=...&key=... w adresie - attach_table odtworzy grę z checkpointu
+    st.session_state.clear()
+
+# Sprawdza bezczynność bez udziału gracza; przebiegi fragmentu nie odświeżają table_seen
+@st.fragment(run_every=min(sessions.SWEEP_INTERVAL, sessions.IDLE_TTL))
+def idle_watch():
+    if time.time() - st.session_state.get("table_seen", time.time()) > sessions.IDLE_TTL:
+        park_table()
+        st.rerun(scope="app")
+
+def parked_screen():
+    st.title("💤 Stolik uśpiony")
+    st.write("Gra długo czekała bez ruchu, więc została odłożona. Nic nie przepadło.")
+    st.button("▶️ Wróć do gry", on_click=wake_table)
+
+# ------------------------------
+# Dziennik gier - wznowienie po restarcie
+# ------------------------------
+
+# Stan ustalony przed pierwszym pytaniem - do dziennika raz, przy "Rozpocznij grę"
+SETUP_KEYS = ("players", "team_names", "players_team_0", "players_team_1", "all_players", "team_players",
+              "use_players", "chosen_categories", "virtual_board", "board_renderer", "scores")
+
+@st.cache_resource(show_spinner=False)
+def load_journal(path):
+    return journal.GameJournal(path)
+
+def game_journal():
+    return load_journal(journal.JOURNAL_DB)
+
+def journal_start():
+    setup = {key: st.session_state[key] for key in SETUP_KEYS if key in st.session_state}
+    game_journal().start(st.session_state.table_id, st.session_state.mode, setup,
+                         sessions.owner_hash(st.session_state.table_key))
+    st.session_state.journal_used = st.session_state.used_questions
+
+def journal_round():
+    # Po każdym zapisanym pytaniu: ostatni wiersz logu, wyniki i pytania wylosowane od poprzedniego wpisu
+    log = round_log()
+    used = st.session_state.used_questions
+    current = st.session_state.current_question
+    with profiling.span("journal_round"):
+        game_journal().append(st.session_state.table_id, st.session_state.questions_asked, {
+            "log": log.record(len(log) - 1),
+            "scores": st.session_state.scores,
+            "asked": st.session_state.questions_asked,
+            "ask_continue": st.session_state.ask_continue,
+            "current": current["id"] if current else None,
+            "used": list(bank.ids(used & ~st.session_state.journal_used)),
+        })
+    st.session_state.journal_used = used
+
+def journal_finish():
+    # Ekran końcowy: gra zamknięta w dzienniku, nie wraca na ekran wznowienia
+    if not st.session_state.get("journal_finished") and "table_id" in st.session_state:
+        game_journal().finish(st.session_state.table_id)
+        st.session_state.journal_finished = True
+
+def journal_question(question_id):
+    try:
+        return bank.question(bank.index_of(question_id))
+    except KeyError:    # pytanie zniknęło z banku od zapisu
+        return None
+
+def restore_from_journal(table_id, key):
+    with profiling.span("journal_load"):
+        game = game_journal().load(table_id, sessions.owner_hash(key))
+    if game is None:
+        return False
+    mode, setup, rounds = game
+    for key, value in setup.items():
+        st.session_state[key] = value
+    st.session_state.mode = mode
+    st.session_state.step = "game"
+
+    log = round_log()
+    used = 0
+    for r in rounds:
+        round_no, number, question_id, *rest = r["log"]
+        question = journal_question(question_id)
+        if question is not None:
+            log.append(round_no, number, question, *rest)
+        used |= bank.mask(r["used"])
+    if rounds:
+        last = rounds[-1]
+        st.session_state.scores = last["scores"]
+        st.session_state.questions_asked = last["asked"]
+        st.session_state.ask_continue = last["ask_continue"]
+        st.session_state.current_question = journal_question(last["current"]) if last["current"] else None
+    st.session_state.used_questions = used
+    st.session_state.journal_used = used
+    start_deck()
+    return True
+
+def resume_game(table_id, key):
+    st.session_state.clear()
+    if restore_from_journal(table_id, key):
+        adopt_table(table_id, key)
+    else:
+        leave_table()
+
+def resume_screen():
+    # Tylko gra z adresu tej sesji (stolik + klucz właściciela), której nie ma w checkpoincie
+    table_id = st.query_params.get("table")
+    key = st.query_params.get("key")
+    if not sessions.valid_table_id(table_id) or not sessions.valid_owner_key(key):
+        return
+    game = game_journal().pending(table_id, sessions.owner_hash(key))
+    if game is None:
+        return
+    mode, setup, updated, asked = game
+    st.subheader("⏯️ Niedokończona gra")
+    players = ", ".join(setup.get("players") or setup.get("team_names") or [])
+    label = f"▶️ {mode}: {players} – {asked} pytań (ostatnio {time.strftime('%H:%M', time.localtime(updated))})"
+    st.button(label, key="resume_game", on_click=resume_game, args=(table_id, key))
+
+# ------------------------------
+# Przejścia stanu
+# ------------------------------
+
+# Przyciski zmieniają stan w callbackach on_click, które Streamlit wykonuje przed
+# rerunem - jedna akcja użytkownika = jedno wykonanie skryptu, bez st.rerun()
+
+def set_state(**changes):
+    for key, value in changes.items():
+        st.session_state[key] = value
+
+def reset_to_mode_select():
+    table_id = st.session_state.get("table_id")
+    if table_id is not None:
+        table_registry().forget(table_id)
+        game_journal().close(table_id)
+    st.query_params.pop("table", None)
+    st.query_params.pop("key", None)
+    st.session_state.clear()
+    st.session_state.step = "mode_select"
+    st.session_state.mode = "None"
+
+def select_mode(mode):
+    st.session_state.mode = mode
+    st.session_state.step = "setup"
+    # Od wyboru trybu gra jest stolikiem w rejestrze; identyfikator i klucz w adresie pozwalają do niej wrócić
+    st.session_state.table_id = sessions.new_table_id()
+    st.session_state.table_key = sessions.new_owner_key()
+    st.session_state.table_lease = sessions.new_table_id()
+    st.query_params["table"] = st.session_state.table_id
+    st.query_params["key"] = st.session_state.table_key
+
+def continue_game(step="game"):
+    if st.session_state.pop("journal_finished", False):
+        game_journal().reopen(st.session_state.table_id)
+    st.session_state.ask_continue = False
+    st.session_state.current_question = draw_question()
+    st.session_state.step = step
+
+def finish_question(questions_per_round):
+    # Obsługa postępu gry po zapisaniu pytania
+    st.session_state.questions_asked += 1
+
+    if st.session_state.questions_asked % questions_per_round == 0:
+        st.session_state.ask_continue = True
+        st.session_state.current_question = None
+    else:
+        st.session_state.current_question = draw_question()
+
+    journal_round()
+    close_round_runs()
+
+# Licznik wykonań skryptu - ile pełnych rerunów kosztuje jedno pytanie
+def count_script_run():
+    new_state("run_stats", {"total": 0, "this_round": 0, "per_round": []})
+    st.session_state.run_stats["total"] += 1
+    st.session_state.run_stats["this_round"] += 1
+
+def close_round_runs():
+    stats = st.session_state.run_stats
+    stats["per_round"].append(stats["this_round"])
+    stats["this_round"] = 0
+
 # ------------------------------
 # Losowanie pytania
 # ------------------------------
 
+# ?seed=N w adresie = powtarzalne losowanie, tylko z SPECTRUM_SEED_PARAM=1 (benchmarki) -
+# w produkcji nikt nie ustawi sobie znanej z góry talii
+SEED_PARAM = os.environ.get("SPECTRUM_SEED_PARAM", "") not in ("", "0")
+
+def start_deck():
+    # Talia budowana raz, przy "Rozpocznij grę"
+    seed = st.query_params.get("seed") if SEED_PARAM else None
+    st.session_state.deck = QuestionDeck(
+        bank, st.session_state.chosen_categories, st.session_state.used_questions,
+        random.Random(seed) if seed is not None else None
+    )
+
 def draw_question():
-    if "chosen_categories" not in st.session_state:
+    if "deck" not in st.session_state:
         return None
-    all_qs = []
-    for cat in st.session_state.chosen_categories:
-        all_qs.extend(CATEGORIES.get(cat, []))
-    available = [q for q in all_qs if q["id"] not in st.session_state.used_ids]
-    if not available:
+    with profiling.span("draw_question"):
+        question = st.session_state.deck.draw()
+    if question is None:
         return None
-    question = random.choice(available)
-    st.session_state.used_ids.add(question["id"])
+    st.session_state.used_questions = st.session_state.deck.used
     return question
 
+def remaining_in_category(cat):
+    if "deck" in st.session_state:
+        return st.session_state.deck.remaining(cat)
+    return bank.remaining(cat, st.session_state.get("used_questions", 0))
+
 # ------------------------------
 # Przyciski
 # ------------------------------
@@ -106,90 +402,33 @@ def draw_question():
 def setup_buttons():
     col1, col2 = st.columns([1, 1])
     with col1:
-        if st.button("🔙 Powrót"):
-            st.session_state.clear()
-            st.session_state.step = "mode_select"
-            st.session_state.mode = "None"
-            st.rerun()
+        st.button("🔙 Powrót", on_click=reset_to_mode_select)
 
     with col2:
         if all(st.session_state.players):
-            if st.button("✅ Dalej"):
-                st.session_state.step = "categories"
-                st.rerun()
+            st.button("✅ Dalej", on_click=set_state, kwargs={"step": "categories"})
 def end_buttons():
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("🔁 Jeszcze nie kończymy!"):
-            st.session_state.ask_continue = False
-            st.session_state.current_question = draw_question()
-            st.session_state.step = "game"
-            st.rerun()
+        st.button("🔁 Jeszcze nie kończymy!", on_click=continue_game)
     with col2:
-        if st.button("🔚 Koniec gry"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.session_state.step = "mode_select"
-            st.session_state.mode = "None"
-            st.rerun()
+        st.button("🔚 Koniec gry", on_click=reset_to_mode_select)
 
 # ------------------------------
 # Upload na github
 # ------------------------------
 
-def upload_to_github(file_path, repo, path_in_repo, token, commit_message):
-    with open(file_path, "rb") as f:
-        content = f.read()
-    b64_content = base64.b64encode(content).decode("utf-8")
-
-    url = f"https://api.github.com/repos/{repo}/contents/{path_in_repo}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    data = {
-        "message": commit_message,
-        "content": b64_content,
-        "branch": "main"
-    }
-
-    response = requests.put(url, headers=headers, json=data)
-    return response
-
-def get_next_game_number(repo, token, folder="wyniki"):
-    url = f"https://api.github.com/repos/{repo}/contents/{folder}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        return 1
-
-    files = response.json()
-    today_str = datetime.today().strftime("%Y-%m-%d")
-    max_num = 0
-    for file in files:
-        name = file["name"]
-        if name.startswith(today_str) and name.endswith(".xlsx"):
-            try:
-                num_part = name.split("_gra")[1].split(".xlsx")[0]
-                num = int(num_part)
-                if num > max_num:
-                    max_num = num
-            except (IndexError, ValueError):
-                pass            
-        
-    return max_num + 1
-
-def upload_results_once(data):
-    # --- Upload na GitHub tylko raz ---
-    if not st.session_state.results_uploaded:
-        temp_filename = "wyniki_temp.xlsx"
-        with open(temp_filename, "wb") as f:
-            f.write(data)
-
+def upload_results_once():
+    # --- Wyniki najpierw do lokalnej kolejki (raz na grę), wysyłka w tle - ekran końcowy renderuje się od razu ---
+    import github_upload  # requests dopiero przy pierwszym uploadzie
+    new_state("upload_job", None)
+    new_state("outbox_name", None)
+    if st.session_state.outbox_name is None:
+        with profiling.span("export_xlsx"):
+            data = results_export.export(round_log().events(), "xlsx")
+        st.session_state.outbox_name = github_upload.enqueue_results(data)
+
+    if st.session_state.upload_job is None and not st.session_state.results_uploaded:
         repo = "DawidS25/Spectrum"
         try:
             token = st.secrets["GITHUB_TOKEN"]
@@ -197,25 +436,82 @@ def upload_results_once(data):
             token = None
 
         if token:
-            next_num = get_next_game_number(repo, token)
-            today_str = datetime.today().strftime("%Y-%m-%d")
-            file_name = f"{today_str}_gra{next_num:03d}.xlsx"
-            path_in_repo = f"wyniki/{file_name}"
-            commit_message = f"🎉 Wyniki gry: {file_name}"
-
-            response = upload_to_github(temp_filename, repo, path_in_repo, token, commit_message)
-            if response.status_code == 201:
-                st.success(f"✅ Wyniki zapisane online.")
-                st.session_state.results_uploaded = True
-            else:
-                st.error(f"❌ Błąd zapisu: {response.status_code} – {response.json()}")
+            st.session_state.upload_job = github_upload.upload_results(st.session_state.outbox_name, repo, token)
         else:
-            st.warning("⚠️ Nie udało się zapisać wyników online.")
+            st.warning("⚠️ Nie udało się zapisać wyników online – czekają w lokalnej kolejce.")
+
+    if st.session_state.upload_job is not None:
+        upload_status()
+
+def upload_status():
+    job = st.session_state.upload_job
+    if job.status == "done":
+        st.session_state.results_uploaded = True
+        st.success(f"✅ Wyniki zapisane online.")
+    elif job.status == "failed":
+        st.error(f"❌ Błąd zapisu: {job.message}")
+        st.button("🔁 Spróbuj ponownie", on_click=set_state, kwargs={"upload_job": None})
+    else:
+        upload_progress()
+
+# Odpytywanie zadania co sekundę - przerysowuje się tylko ten fragment
+@st.fragment(run_every=1)
+def upload_progress():
+    if st.session_state.upload_job.finished:
+        st.rerun()
+    st.info("⏳ Zapisywanie wyników online...")
+
+# ------------------------------
+# Eksport wyników
+# ------------------------------
+
+def round_log():
+    if "round_log" not in st.session_state:
+        st.session_state.round_log = RoundLog(bank, st.session_state.mode)
+    return st.session_state.round_log
+
+def results_downloads():
+    journal_finish()
+    if not len(round_log()):
+        return
+    new_state("results_uploaded", False)
+
+    fmt = st.radio(
+        "Format pliku", list(results_export.FORMATS), horizontal=True,
+        format_func=lambda f: results_export.FORMATS[f][0], key="export_format"
+    )
+    label, extension, mime = results_export.FORMATS[fmt]
+    st.download_button(
+        label=f"💾 Pobierz wyniki gry ({label})",
+        data=results_export.deferred_export(round_log(), fmt),
+        file_name=f"wyniki_gry.{extension}",
+        mime=mime,
+        on_click="ignore"   # pobranie nie przerysowuje strony
+    )
+
+    upload_results_once()
 
 # ------------------------------
 # Ekran kategorii
 # ------------------------------
 
+def toggle_category(cat):
+    if cat in st.session_state.category_selection:
+        st.session_state.category_selection.remove(cat)
+    else:
+        st.session_state.category_selection.add(cat)
+
+def back_to_setup():
+    if "category_selection" in st.session_state:
+        del st.session_state["category_selection"]
+    st.session_state.step = "setup"
+
+def start_game():
+    st.session_state.chosen_categories = list(st.session_state.category_selection)
+    start_deck()
+    st.session_state.step = "game"
+    journal_start()
+
 def category_selection_screen(CATEGORIES, CATEGORY_EMOJIS):
     st.header("📚 Wybierz kategorie pytań")
 
@@ -224,33 +520,21 @@ def category_selection_screen(CATEGORIES, CATEGORY_EMOJIS):
     cols = st.columns(4)
     for i, cat in enumerate(CATEGORIES.keys()):
         col = cols[i % 4]
-        display_name = f"{CATEGORY_EMOJIS.get(cat, '')} {cat}"
+        display_name = f"{CATEGORY_EMOJIS.get(cat, '')} {cat} ({remaining_in_category(cat)})"
         if cat in st.session_state.category_selection:
-            if col.button(f"✅ {display_name}", key=f"cat_{cat}"):
-                st.session_state.category_selection.remove(cat)
-                st.rerun()
-        else:
-            if col.button(display_name, key=f"cat_{cat}"):
-                st.session_state.category_selection.add(cat)
-                st.rerun()
+            display_name = f"✅ {display_name}"
+        col.button(display_name, key=f"cat_{cat}", on_click=toggle_category, args=(cat,))
 
     selected_display = [f"{CATEGORY_EMOJIS.get(cat, '')} {cat}" for cat in st.session_state.category_selection]
     st.markdown(f"**Wybrane kategorie:** {', '.join(selected_display) or 'Brak'}")
 
     col1, col2 = st.columns([1, 1])
     with col1:
-        if st.button("🔙 Powrót"):
-            if "category_selection" in st.session_state:
-                del st.session_state["category_selection"]
-            st.session_state.step = "setup"
-            st.rerun()
+        st.button("🔙 Powrót", on_click=back_to_setup)
 
     with col2:
         if st.session_state.category_selection:
-            if st.button("🎯 Rozpocznij grę"):
-                st.session_state.chosen_categories = list(st.session_state.category_selection)
-                st.session_state.step = "game"
-                st.rerun()
+            st.button("🎯 Rozpocznij grę", on_click=start_game)
 
 # ------------------------------
 # Ekran setup
@@ -281,9 +565,8 @@ def guesser_points_buttons(guesser):
     cols = st.columns(4)
     for i, val in enumerate([0, 2, 3, 4]):
         label = f"✅ {val}" if st.session_state.guesser_points == val else f"{val}"
-        if cols[i].button(label, key=f"gp_{val}_{st.session_state.questions_asked}"):
-            st.session_state.guesser_points = val
-            st.rerun()
+        cols[i].button(label, key=f"gp_{val}_{st.session_state.questions_asked}",
+                       on_click=set_state, kwargs={"guesser_points": val})
 
 # ------------------------------
 # Ekran kontynuacji gry
@@ -297,14 +580,9 @@ def handle_continue_decision(questions_per_round):
 
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("✅ Tak, kontynuuj"):
-            st.session_state.ask_continue = False
-            st.session_state.current_question = draw_question()
-            st.rerun()
+        st.button("✅ Tak, kontynuuj", on_click=continue_game)
     with col2:
-        if st.button("❌ Zakończ i pokaż wyniki"):
-            st.session_state.step = "end"
-            st.rerun()
+        st.button("❌ Zakończ i pokaż wyniki", on_click=set_state, kwargs={"step": "end"})
 
 def prepare_next_question():
     if not st.session_state.current_question:
@@ -326,6 +604,11 @@ if "step" in st.session_state and st.session_state.step in ["mode_select", "setu
     )
 
 
+def change_question():
+    new_q = draw_question()
+    if new_q:
+        st.session_state.current_question = new_q
+
 def round_info(q, current_round, current_question_number):
     st.markdown(f"##### 🥊 Runda {current_round}")
     st.markdown(
@@ -342,31 +625,34 @@ def round_info(q, current_round, current_question_number):
         st.markdown(f"<small>id: {q['id']}</small>", unsafe_allow_html=True)
     with col2:
         if "virtual_board_step" not in st.session_state or st.session_state.virtual_board_step not in ["guess", "score"]:
-            if st.button("🔄 Zmień pytanie"):
-                new_q = draw_question()
-                if new_q:
-                    st.session_state.current_question = new_q
-                st.rerun()
+            st.button("🔄 Zmień pytanie", on_click=change_question)
     with col3:
         if "virtual_board_step" not in st.session_state or st.session_state.virtual_board_step not in ["guess", "score"]:
             if st.button("⚠️"):
+                import github_upload
                 file_path = "reported_questions.csv"
                 repo = "DawidS25/Spectrum"
                 commit_message = "🚨 Zgłoszono pytanie"
                 file_exists = os.path.isfile(file_path)
-                with open(file_path, "a", newline="", encoding="utf-8") as f:
-                    writer = csv.DictWriter(f, fieldnames=q.keys(), delimiter=";")
+                with open(file_path, "a+b") as f:
+                    row = io.StringIO(newline="")
+                    writer = csv.DictWriter(row, fieldnames=q.keys(), delimiter=";")
                     if not file_exists:
                         writer.writeheader()
                     writer.writerow(q)
+                    f.write(row.getvalue().encode("utf-8"))
+                    # Cały plik do wysyłki z tego samego uchwytu - bez ponownego otwierania
+                    f.seek(0)
+                    payload = f.read()
                 try:
                     token = st.secrets["GITHUB_TOKEN"]
                 except Exception:
                     token = None
                                 
                 if token:
-                    response = upload_to_github(file_path, repo, file_path, token, commit_message)
-                    if response.status_code == 201:
+                    with profiling.span("github_report"):
+                        response = github_upload.update_on_github(payload, repo, file_path, token, commit_message)
+                    if response.status_code in (200, 201):
                         st.success(f"🚨 Pytanie zostało zgłoszone")
                         st.session_state.results_uploaded = True
                     else:
@@ -392,132 +678,41 @@ def round_info(q, current_round, current_question_number):
 new_state("answer_slider_val", 0)
 new_state("guess_slider_val", 0)
 
-total_width = 26
-half_width = total_width / 2
-center_base = 3
-
-colors = {
-    "2": "#FFDAB5",
-    "3": "#ADD8E6",
-    "4": "#3399FF",
-    "tlo": "#F5F5DC",
-    "promien": "red"
-}
-
-segment_sequence = [
-    ("2", colors["2"], 5),
-    ("3", colors["3"], 5),
-    ("4", colors["4"], 6),
-    ("3", colors["3"], 5),
-    ("2", colors["2"], 5)
-]
-
-def draw_answer(ax, center_angle, width, color):
-    theta1 = center_angle - width / 2
-    theta2 = center_angle + width / 2
-    theta1_clip = max(theta1, 0)
-    theta2_clip = min(theta2, 180)
-    if theta1_clip >= theta2_clip:
-        return
-    theta = np.linspace(theta1_clip, theta2_clip, 100)
-    x = np.cos(np.deg2rad(theta))
-    y = np.sin(np.deg2rad(theta))
-    x = np.append(x, 0)
-    y = np.append(y, 0)
-    ax.fill(x, y, color=color, alpha=1)
-def draw_guess(guess_angle_deg):
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.set_aspect('equal')
-    ax.axis('off')
-    # Tło półkola
-    theta_bg = np.linspace(0, 180, 300)
-    x_bg = np.cos(np.deg2rad(theta_bg))
-    y_bg = np.sin(np.deg2rad(theta_bg))
-    ax.fill(np.append(x_bg, 0), np.append(y_bg, 0), color=colors["tlo"])
-    # Czerwony promień
-    rad = np.deg2rad(guess_angle_deg)
-    x_end = np.cos(rad)
-    y_end = np.sin(rad)
-    ax.plot([0, x_end], [0, y_end], color=colors["promien"], linewidth=3)
-    return fig
-def draw_score(answer_slider, guess_slider):
-    answer_deg = 174 - (answer_slider + 100) * 174 / 200
-    guess_deg = 177 - (guess_slider + 100) / 200 * (177 - 3)
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.set_aspect('equal')
-    ax.axis('off')
-
-    # Tło półkola
-    theta_bg = np.linspace(0, 180, 300)
-    x_bg = np.cos(np.deg2rad(theta_bg))
-    y_bg = np.sin(np.deg2rad(theta_bg))
-    ax.fill(np.append(x_bg, 0), np.append(y_bg, 0), color=colors["tlo"])
-
-    start_angle = center_base - half_width + answer_deg
-    current_angle = start_angle
-    for label, color, width in segment_sequence:
-        center_angle = current_angle + width / 2
-        draw_answer(ax, center_angle, width, color)
-        current_angle += width
-
-    # Promień
-    rad = np.deg2rad(guess_deg)
-    x_end = np.cos(rad)
-    y_end = np.sin(rad)
-    ax.plot([0, x_end], [0, y_end], color=colors["promien"], linewidth=1)
-
-    return fig
+def show_board(kind, *sliders):
+    # PNG (matplotlib) albo lekki SVG - wybierane na ekranie trybu gry
+    render = board.RENDERERS[st.session_state.board_renderer][kind]
+    with profiling.span(f"board_{st.session_state.board_renderer}_{kind}"):
+        image = render(*sliders)
+    st.image(image, width="stretch")
 
 def answer_board():
     answer_slider = st.slider("Przesuń tarczę", -100, 100, st.session_state.answer_slider_val, label_visibility="collapsed")
-    answer_deg = 174 - (answer_slider + 100) * 174 / 200 # -100 => 174 ;  100 => 0
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.set_aspect('equal')
-    ax.axis('off')
-    theta_bg = np.linspace(0, 180, 300)
-    x_bg = np.cos(np.deg2rad(theta_bg))
-    y_bg = np.sin(np.deg2rad(theta_bg))
-    ax.fill(np.append(x_bg, 0), np.append(y_bg, 0), color=colors["tlo"])
-
-    start_angle = center_base - half_width + answer_deg
-    current_angle = start_angle
-    for label, color, width in segment_sequence:
-        center_angle = current_angle + width / 2
-        draw_answer(ax, center_angle, width, color)
-        current_angle += width
-
-    st.pyplot(fig)
+    show_board("answer", answer_slider)
     return answer_slider
 
 def guess_board():
     guess_slider = st.slider("Ustaw promień", -100, 100, st.session_state.guess_slider_val, label_visibility="collapsed")
-    guess_deg = 177 - (guess_slider + 100) / 200 * (177 - 3)
-    st.pyplot(draw_guess(guess_deg))
+    show_board("guess", guess_slider)
     return guess_slider
 
 def direction_board():
-    guess_deg = 177.5 - (st.session_state.guess_slider_val + 100) / 200 * (177.5 - 2.5)
-    st.pyplot(draw_guess(guess_deg))
+    show_board("direction", st.session_state.guess_slider_val)
     
     new_state("director_choice", None)
 
+    # Wybór kierunku przez callback - przerysowuje się tylko fragment planszy
     col1, col2, col3 = st.columns(3)
     with col1:
-        if st.button(("✅ " if st.session_state.director_choice == "left" else "") + "⬅ Lewo"):
-            st.session_state.director_choice = "left"
-            st.rerun()
+        st.button(("✅ " if st.session_state.director_choice == "left" else "") + "⬅ Lewo",
+                  on_click=set_state, kwargs={"director_choice": "left"})
 
     with col2:
-        if st.button(("✅ " if st.session_state.director_choice == "perfect" else "") + "⏺ Idealnie"):
-            st.session_state.director_choice = "perfect"
-            st.rerun()
+        st.button(("✅ " if st.session_state.director_choice == "perfect" else "") + "⏺ Idealnie",
+                  on_click=set_state, kwargs={"director_choice": "perfect"})
 
     with col3:
-        if st.button(("✅ " if st.session_state.director_choice == "right" else "") + "➡ Prawo"):
-            st.session_state.director_choice = "right"
-            st.rerun()
+        st.button(("✅ " if st.session_state.director_choice == "right" else "") + "➡ Prawo",
+                  on_click=set_state, kwargs={"director_choice": "right"})
     
 def left_right():
     q = st.session_state.current_question
@@ -529,7 +724,7 @@ def left_right():
     """, unsafe_allow_html=True)
 
 def score_board(responder, guesser, director = None):
-    st.pyplot(draw_score(st.session_state.answer_slider_val, st.session_state.guess_slider_val))
+    show_board("score", st.session_state.answer_slider_val, st.session_state.guess_slider_val)
     left_right()
     diff = st.session_state.answer_slider_val - st.session_state.guess_slider_val
     if abs(diff) <= 3:
@@ -564,131 +759,83 @@ def score_board(responder, guesser, director = None):
         st.markdown(f"Punktacja: **{guesser}**: {guesser_points} | **{responder}**: {responder_points}")
     return guesser_points, responder_points, extra_points
 
+# Plansze z suwakami jako fragmenty - przesunięcie suwaka przerysowuje tylko planszę,
+# pełny rerun aplikacji dopiero po przycisku "Zatwierdź ..."
+@st.fragment
+def answer_step():
+    answer_slider = answer_board()
+    left_right()
+    if st.button("Zatwierdź odpowiedź"):
+        st.session_state.answer_slider_val = answer_slider
+        st.session_state.virtual_board_step = "guess"
+        st.rerun()
+
+@st.fragment
+def guess_step(director):
+    guess_slider = guess_board()
+    left_right()
+    if director is None:
+        if st.button("Zatwierdź punktację"):
+            st.session_state.guess_slider_val = guess_slider
+            st.session_state.virtual_board_step = "score"
+            st.rerun()
+    else:
+        if st.button("Zatwierdź punktację"):
+            st.session_state.guess_slider_val = guess_slider
+            st.session_state.virtual_board_step = "direction"
+            st.rerun()
+
+@st.fragment
+def direction_step():
+    direction = direction_board()
+    left_right()
+    if st.session_state.director_choice is not None:
+        if st.button("Zatwierdź kierunek"):
+            st.session_state.direction = direction
+            st.session_state.virtual_board_step = "score"
+            st.rerun()
+
+def save_virtual_round(q_per_r, responder, guesser, director, points):
+    # Reset planszy
+    del st.session_state.virtual_board_step
+    if "director_choice" in st.session_state:
+        del st.session_state.director_choice
+    st.session_state.answer_slider_val = 0
+    st.session_state.guess_slider_val = 0
+
+    if st.session_state.mode == "2-osobowy":
+        st.session_state.scores[guesser] += points[0]
+        st.session_state.scores[responder] += points[1]
+    else: 
+        st.session_state.scores[guesser] += points[0]
+        st.session_state.scores[responder] += points[1]
+        st.session_state.scores[director] += points[2]
+
+    # Dopisywanie wyników do logu rund
+    q, current_round, current_question_number = question_and_round_info(q_per_r)
+    if st.session_state.mode == "2-osobowy":
+        round_log().append(current_round, current_question_number, q, responder, guesser, points[1], points[0])
+    else:
+        round_log().append(current_round, current_question_number, q, responder, guesser, points[1], points[0],
+                           director, points[2])
+
+    finish_question(q_per_r)
+
 def virtual_scoreboard(q_per_r, responder, guesser, director = None):
     new_state("virtual_board_step", "answer")
     if st.session_state.virtual_board_step == "answer":
-        answer_slider = answer_board()
-        left_right()
-        if st.button("Zatwierdź odpowiedź"):
-            st.session_state.answer_slider_val = answer_slider
-            st.session_state.virtual_board_step = "guess"
-            st.rerun()
+        answer_step()
 
     elif st.session_state.virtual_board_step == "guess":
-        guess_slider = guess_board()
-        left_right()
-        if director is None:
-            if st.button("Zatwierdź punktację"):
-                st.session_state.guess_slider_val = guess_slider
-                st.session_state.virtual_board_step = "score"
-                st.rerun()
-        else:
-            if st.button("Zatwierdź punktację"):
-                st.session_state.guess_slider_val = guess_slider
-                st.session_state.virtual_board_step = "direction"
-                st.rerun()
+        guess_step(director)
     
     elif st.session_state.virtual_board_step == "direction":
-        direction = direction_board()
-        left_right()
-        if st.session_state.director_choice is not None:
-            if st.button("Zatwierdź kierunek"):
-                st.session_state.direction = direction
-                st.session_state.virtual_board_step = "score"
-                st.rerun()
+        direction_step()
     
     elif st.session_state.virtual_board_step == "score":
         points = score_board(responder, guesser, director)
-        if st.button("✅ Następne pytanie!"):
-            # Reset planszy
-            del st.session_state.virtual_board_step
-            if "director_choice" in st.session_state:
-                del st.session_state.director_choice
-            st.session_state.answer_slider_val = 0
-            st.session_state.guess_slider_val = 0
-
-            if st.session_state.mode == "2-osobowy":
-                st.session_state.scores[guesser] += points[0]
-                st.session_state.scores[responder] += points[1]
-            else: 
-                st.session_state.scores[guesser] += points[0]
-                st.session_state.scores[responder] += points[1]
-                st.session_state.scores[director] += points[2]
-
-            # Zapis do results_data
-            q, current_round, current_question_number = question_and_round_info(q_per_r)
-
-            if st.session_state.mode == "Drużynowy":
-                points_this_round = {
-                    responder: points[1],
-                    guesser: points[0],
-                    director: points[2],
-                }
-            elif st.session_state.mode == "3-osobowy":
-                points_this_round = {
-                    responder: points[1],
-                    guesser: points[0],
-                    director: points[2],
-                }
-            elif st.session_state.mode == "2-osobowy":
-                points_this_round = {
-                    responder: points[1],
-                    guesser: points[0],
-                }
-
-            # Dopisywanie wyników do pamięci
-            new_state("results_data", [])
-
-            if st.session_state.mode == "Drużynowy":
-                data_to_save = {
-                "runda": current_round,
-                "pytanie_nr": current_question_number,
-                "kategoria": q['category'],
-                "pytanie": q['text'],
-                "odpowiada": responder,
-                "zgaduje_drużyna": guesser,
-                "kierunek_drużyna": director,
-                "punkty_za_odpowiedź": points_this_round[responder],
-                guesser: points_this_round[guesser],
-                director: points_this_round[director],
-                }
-            elif st.session_state.mode == "3-osobowy":
-                data_to_save = {
-                    "runda": current_round,
-                    "nr_pytania": current_question_number,
-                    "kategoria": q['category'],
-                    "pytanie": q['text'],
-                    "odpowiada": responder,
-                    "zgaduje": guesser,
-                    "dodatkowo": director,
-                    responder: points_this_round[responder],
-                    guesser: points_this_round[guesser],
-                    director: points_this_round[director],
-                }
-            elif st.session_state.mode == "2-osobowy":
-                data_to_save = {
-                    "nr_pytania": current_question_number,
-                    "kategoria": q['category'],
-                    "pytanie": q['text'],
-                    "odpowiada": responder,
-                    "zgaduje": guesser,
-                    responder: points_this_round[responder],
-                    guesser: points_this_round[guesser],
-                }
-
-            st.session_state.results_data.append(data_to_save)
-
-            # Obsługa postępu gry
-            st.session_state.questions_asked += 1
-
-            if st.session_state.questions_asked % q_per_r == 0:
-                st.session_state.ask_continue = True
-                st.session_state.current_question = None
-            else:
-                st.session_state.current_question = draw_question()
-
-            st.rerun()
-
+        st.button("✅ Następne pytanie!", on_click=save_virtual_round,
+                  args=(q_per_r, responder, guesser, director, points))
 
 
 
@@ -704,6 +851,32 @@ def virtual_scoreboard(q_per_r, responder, guesser, director = None):
 # Tryb 2-osobowy
 # ----------------------------------------------------------------------------------------------------------------
 
+def save_round_2osobowy(responder, guesser, q, current_round, current_question_number):
+    guesser_points = st.session_state.guesser_points
+
+    # Reset wyborów
+    st.session_state.guesser_points = None
+
+    # Liczenie punktów dla respondera według zasad:
+    if guesser_points == 0:
+        responder_points = 0
+    elif guesser_points in [2, 3]:
+        responder_points = 1
+    elif guesser_points == 4:
+        responder_points = 2
+    else:
+        responder_points = 0
+
+    # Aktualizacja wyników
+    st.session_state.scores[guesser] += guesser_points
+    st.session_state.scores[responder] += responder_points
+
+    # Dopisywanie wyników do logu rund
+    round_log().append(current_round, current_question_number, q, responder, guesser,
+                       responder_points, guesser_points)
+
+    finish_question(2)
+
 def run_2osobowy():
     init_session_state(get_default_session_state("2-osobowy"))
     virtual_board_val = st.session_state.virtual_board
@@ -744,57 +917,8 @@ def run_2osobowy():
                 guesser_points_buttons(guesser)
 
                 if st.session_state.guesser_points is not None:
-                    if st.button("💾 Zapisz i dalej"):
-                        guesser_points = st.session_state.guesser_points
-
-                        # Reset wyborów
-                        st.session_state.guesser_points = None
-
-                        # Liczenie punktów dla respondera według zasad:
-                        if guesser_points == 0:
-                            responder_points = 0
-                        elif guesser_points in [2, 3]:
-                            responder_points = 1
-                        elif guesser_points == 4:
-                            responder_points = 2
-                        else:
-                            responder_points = 0
-                            
-                        # Aktualizacja wyników
-                        st.session_state.scores[guesser] += guesser_points
-                        st.session_state.scores[responder] += responder_points
-
-                        points_this_round = {
-                            responder: responder_points,
-                            guesser: guesser_points,
-                        }
-
-                        # Dopisywanie wyników do pamięci
-                        new_state("results_data", [])
-
-                        data_to_save = {
-                            "runda": current_round,
-                            "nr_pytania": current_question_number,
-                            "kategoria": q['category'],
-                            "pytanie": q['text'],
-                            "odpowiada": responder,
-                            "zgaduje": guesser,
-                            responder: points_this_round[responder],
-                            guesser: points_this_round[guesser],
-                        }
-
-                        st.session_state.results_data.append(data_to_save)
-
-                        st.session_state.questions_asked += 1
-
-                        # Po 2 pytaniach pokazujemy pytanie czy kontynuować
-                        if st.session_state.questions_asked % 2 == 0:
-                            st.session_state.ask_continue = True
-                            st.session_state.current_question = None
-                        else:
-                            st.session_state.current_question = draw_question()
-
-                        st.rerun()
+                    st.button("💾 Zapisz i dalej", on_click=save_round_2osobowy,
+                              args=(responder, guesser, q, current_round, current_question_number))
 
     elif st.session_state.step == "end":
         total_questions = st.session_state.questions_asked
@@ -810,29 +934,37 @@ def run_2osobowy():
         st.markdown("---")
         end_buttons()
         
-        if "results_data" in st.session_state and st.session_state.results_data:
-            
-            new_state("results_uploaded", False)
-
-            df_results = pd.DataFrame(st.session_state.results_data)
-
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_results.to_excel(writer, index=False, sheet_name='Wyniki')
-            data = output.getvalue()
-
-            st.download_button(
-                label="💾 Pobierz wyniki gry (XLSX)",
-                data=data,
-                file_name="wyniki_gry.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-
-            upload_results_once(data)
+        results_downloads()
 
 # ----------------------------------------------------------------------------------------------------------------
 # Tryb 3-osobowy
 # ----------------------------------------------------------------------------------------------------------------
+def save_round_3osobowy(responder, guesser, director, q, current_round, current_question_number):
+    guesser_points = st.session_state.guesser_points
+    extra_point = st.session_state.extra_point
+
+    # Reset wyborów
+    st.session_state.guesser_points = None
+    st.session_state.extra_point = None
+
+    # Liczenie punktów globalnych
+    st.session_state.scores[guesser] += guesser_points
+    st.session_state.scores[director] += extra_point
+    responder_points = 0
+    if guesser_points in [2, 3]:
+        responder_points = 1
+    elif guesser_points == 4:
+        responder_points = 2
+    if extra_point == 1:
+        responder_points += 1
+    st.session_state.scores[responder] += responder_points
+
+    # Dopisywanie wyników do logu rund
+    round_log().append(current_round, current_question_number, q, responder, guesser,
+                       responder_points, guesser_points, director, extra_point)
+
+    finish_question(6)
+
 def run_3osobowy():
     init_session_state(get_default_session_state("3-osobowy"))
     if st.session_state.step == "setup":
@@ -884,64 +1016,12 @@ def run_3osobowy():
                 cols2 = st.columns(2)
                 for i, val in enumerate([0, 1]):
                     label = f"✅ {val}" if st.session_state.extra_point == val else f"{val}"
-                    if cols2[i].button(label, key=f"ep_{val}_{st.session_state.questions_asked}"):
-                        st.session_state.extra_point = val
-                        st.rerun()
+                    cols2[i].button(label, key=f"ep_{val}_{st.session_state.questions_asked}",
+                                    on_click=set_state, kwargs={"extra_point": val})
 
                 if st.session_state.guesser_points is not None and st.session_state.extra_point is not None:
-                    if st.button("💾 Zapisz i dalej"):
-                        guesser_points = st.session_state.guesser_points
-                        extra_point = st.session_state.extra_point
-
-                        # Reset wyborów
-                        st.session_state.guesser_points = None
-                        st.session_state.extra_point = None
-
-                        # Liczenie punktów globalnych
-                        st.session_state.scores[guesser] += guesser_points
-                        st.session_state.scores[director] += extra_point
-                        responder_points = 0
-                        if guesser_points in [2, 3]:
-                            responder_points = 1
-                        elif guesser_points == 4:
-                            responder_points = 2
-                        if extra_point == 1:
-                            responder_points += 1
-                        st.session_state.scores[responder] += responder_points
-
-                        points_this_round = {
-                            responder: responder_points,
-                            guesser: guesser_points,
-                            director: extra_point
-                        }
-
-                        # DOPISYWANIE WYNIKÓW DO LISTY W PAMIĘCI
-                        new_state("results_data", [])
-
-                        data_to_save = {
-                            "runda": current_round,
-                            "nr_pytania": current_question_number,
-                            "kategoria": q['category'],
-                            "pytanie": q['text'],
-                            "odpowiada": responder,
-                            "zgaduje": guesser,
-                            "dodatkowo": director,
-                            responder: points_this_round[responder],
-                            guesser: points_this_round[guesser],
-                            director: points_this_round[director],
-                        }
-
-                        st.session_state.results_data.append(data_to_save)
-
-                        st.session_state.questions_asked += 1
-
-                        if st.session_state.questions_asked % 6 == 0:
-                            st.session_state.ask_continue = True
-                            st.session_state.current_question = None
-                        else:
-                            st.session_state.current_question = draw_question()
-
-                        st.rerun()
+                    st.button("💾 Zapisz i dalej", on_click=save_round_3osobowy,
+                              args=(responder, guesser, director, q, current_round, current_question_number))
 
     elif st.session_state.step == "end":
         total_questions = st.session_state.questions_asked
@@ -957,29 +1037,42 @@ def run_3osobowy():
         st.markdown("---")
         end_buttons()
 
-        # --- Generowanie pliku Excel z wyników w pamięci ---
-        if "results_data" in st.session_state and st.session_state.results_data:
-            new_state("results_uploaded", False)
+        results_downloads()
 
-            df_results = pd.DataFrame(st.session_state.results_data)
+# ----------------------------------------------------------------------------------------------------------------
+# Tryb drużynowy
+# ----------------------------------------------------------------------------------------------------------------
 
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_results.to_excel(writer, index=False, sheet_name='Wyniki')
-            data = output.getvalue()
+def save_round_druzynowy(responder_name, responder, guessing_team, other_team, q, current_round, current_question_number, questions_per_round):
+    guesser_points = st.session_state.guesser_points
+    extra_point = st.session_state.extra_point
 
-            st.download_button(
-                label="💾 Pobierz wyniki gry (XLSX)",
-                data=data,
-                file_name="wyniki_gry.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+    st.session_state.guesser_points = None
+    st.session_state.extra_point = None
 
-            upload_results_once(data)
+    st.session_state.scores[guessing_team] += guesser_points
+    st.session_state.scores[other_team] += extra_point
 
-# ----------------------------------------------------------------------------------------------------------------
-# Tryb drużynowy
-# ----------------------------------------------------------------------------------------------------------------
+    responder_points = 0
+    if guesser_points == 0:
+        responder_points = 0
+    elif guesser_points in [2, 3]:
+        responder_points = 1
+    elif guesser_points == 4:
+        responder_points = 2
+    else:
+        responder_points = 0
+
+    player_id = f"{responder_name}_{guessing_team}"
+    st.session_state.scores[player_id] += responder_points + extra_point
+
+    round_log().append(current_round, current_question_number, q, responder, guessing_team,
+                       responder_points + extra_point, guesser_points, other_team, extra_point)
+
+    finish_question(questions_per_round)
+
+def add_team_player(players_key):
+    st.session_state[players_key].append("")
 
 def run_druzynowy():
     init_session_state(get_default_session_state("Drużynowy"))
@@ -1008,9 +1101,8 @@ def run_druzynowy():
                 st.session_state[players_key][i] = new_name.strip()
 
             if len(players_list) < 7:
-                if st.button(f"➕ Dodaj kolejnego gracza do drużyny {st.session_state.team_names[team_index]}", key=f"add_player_{team_index}"):
-                    st.session_state[players_key].append("")
-                    st.rerun()
+                st.button(f"➕ Dodaj kolejnego gracza do drużyny {st.session_state.team_names[team_index]}", key=f"add_player_{team_index}",
+                          on_click=add_team_player, args=(players_key,))
 
         col1, col2 = st.columns(2)
         with col1:
@@ -1061,16 +1153,10 @@ def run_druzynowy():
 
         col1, col2 = st.columns([1, 1])
         with col1:
-            if st.button("🔙 Powrót"):
-                st.session_state.clear()
-                st.session_state.step = "mode_select"
-                st.session_state.mode = "None"
-                st.rerun()
+            st.button("🔙 Powrót", on_click=reset_to_mode_select)
         with col2:
             if valid_players_count() and valid_balance():
-                if st.button("✅ Dalej"):
-                    st.session_state.step = "categories"
-                    st.rerun()
+                st.button("✅ Dalej", on_click=set_state, kwargs={"step": "categories"})
 
     elif st.session_state.step == "categories":
         category_selection_screen(CATEGORIES, CATEGORY_EMOJIS)
@@ -1118,9 +1204,8 @@ def run_druzynowy():
                 cols = st.columns(4)
                 for i, val in enumerate([0, 2, 3, 4]):
                     label = f"✅ {val}" if st.session_state.guesser_points == val else f"{val}"
-                    if cols[i].button(label, key=f"gp_{val}_{st.session_state.questions_asked}"):
-                        st.session_state.guesser_points = val
-                        st.rerun()
+                    cols[i].button(label, key=f"gp_{val}_{st.session_state.questions_asked}",
+                                   on_click=set_state, kwargs={"guesser_points": val})
 
                 st.markdown(f"**Dodatkowe punkty dla drużyny {other_team}?**")
                 extra_points_options = [0, 1]
@@ -1129,58 +1214,12 @@ def run_druzynowy():
                 cols2 = st.columns(len(extra_points_options))
                 for i, val in enumerate(extra_points_options):
                     label = f"✅ {val}" if st.session_state.extra_point == val else f"{val}"
-                    if cols2[i].button(label, key=f"ep_{val}_{st.session_state.questions_asked}"):
-                        st.session_state.extra_point = val
-                        st.rerun()
+                    cols2[i].button(label, key=f"ep_{val}_{st.session_state.questions_asked}",
+                                    on_click=set_state, kwargs={"extra_point": val})
 
                 if st.session_state.guesser_points is not None and st.session_state.extra_point is not None:
-                    if st.button("💾 Zapisz i dalej"):
-                        guesser_points = st.session_state.guesser_points
-                        extra_point = st.session_state.extra_point
-
-                        st.session_state.guesser_points = None
-                        st.session_state.extra_point = None
-
-                        st.session_state.scores[guessing_team] += guesser_points
-                        st.session_state.scores[other_team] += extra_point
-
-                        responder_points = 0
-                        if guesser_points == 0:
-                            responder_points = 0
-                        elif guesser_points in [2, 3]:
-                            responder_points = 1
-                        elif guesser_points == 4:
-                            responder_points = 2
-                        else:
-                            responder_points = 0
-                        
-                        player_id = f"{responder_name}_{guessing_team}"
-                        st.session_state.scores[player_id] += responder_points + extra_point
-
-                        data_to_save = {
-                            "runda": current_round,
-                            "pytanie_nr": current_question_number,
-                            "kategoria": q['category'],
-                            "pytanie": q['text'],
-                            "odpowiada": responder,
-                            "zgaduje_drużyna": guessing_team,
-                            "kierunek_drużyna": other_team,
-                            "punkty_za_odpowiedź": responder_points + extra_point,
-                            guessing_team: guesser_points,
-                            other_team: extra_point,
-                            }
-                        new_state("results_data", [])
-                        st.session_state.results_data.append(data_to_save)
-
-                        st.session_state.questions_asked += 1
-
-                        if st.session_state.questions_asked % questions_per_round == 0:
-                            st.session_state.ask_continue = True
-                            st.session_state.current_question = None
-                        else:
-                            st.session_state.current_question = draw_question()
-
-                        st.rerun()
+                    st.button("💾 Zapisz i dalej", on_click=save_round_druzynowy,
+                              args=(responder_name, responder, guessing_team, other_team, q, current_round, current_question_number, questions_per_round))
 
 
     if st.session_state.step == "end":
@@ -1229,72 +1268,72 @@ def run_druzynowy():
         st.markdown("---")
         end_buttons()
 
-        # --- Generowanie pliku Excel z wyników w pamięci ---
-        if "results_data" in st.session_state and st.session_state.results_data:
-            new_state("results_uploaded", False)
-
-            df_results = pd.DataFrame(st.session_state.results_data)
+        results_downloads()
 
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_results.to_excel(writer, index=False, sheet_name='Wyniki')
-            data = output.getvalue()
 
-            st.download_button(
-                label="💾 Pobierz wyniki gry (XLSX)",
-                data=data,
-                file_name="wyniki_gry.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-
-            upload_results_once(data)
 
+# ----------------------------------------------------------------------------------------------------------------
+# Panel diagnostyczny (SPECTRUM_PROFILE=1 i ?debug=1)
+# ----------------------------------------------------------------------------------------------------------------
 
+def debug_panel():
+    with st.sidebar.expander("⏱️ Czasy (p50 / p95)", expanded=True):
+        lines = [
+            f"{key:40} {s['count']:5}  {s['p50_ms']:9.2f} ms  {s['p95_ms']:9.2f} ms"
+            for key, s in profiling.summary().items()
+        ]
+        st.code("\n".join(lines) or "brak pomiarów", language=None)
+        st.write("Reruny tej sesji:", st.session_state.run_stats)
+        st.write("Stoliki:", table_registry().stats())
+        if st.session_state.virtual_board and st.session_state.board_renderer == "png":
+            st.write("Cache planszy PNG:", board.cache_info())
+        # Klient HTTP tylko jeśli już działa - panel nie ładuje requests
+        if "github_client" in sys.modules:
+            st.write("GitHub API:", sys.modules["github_client"].get_client().stats())
+            st.write("Kolejka uploadu:", sys.modules["github_upload"].queue_stats())
+        st.button("🧹 Wyczyść pomiary", on_click=profiling.reset)
 
 # ----------------------------------------------------------------------------------------------------------------
 # Ekran głowny - wybór trybu
 # ----------------------------------------------------------------------------------------------------------------
 
+table_id = attach_table()
 new_state("step", "mode_select")
 new_state("mode", "None")
 new_state("virtual_board", False)
-new_state("pending_mode", None)
-
-def select_mode_and_step_later(mode, step):
-    st.session_state.pending_mode = mode
-    st.session_state.pending_step = step
-
-def select_mode_and_step(mode, step):
-    st.session_state.mode = mode
-    st.session_state.step = step
-    st.rerun()
-
-
-if st.session_state.step == "mode_select":
-    st.title("🎮 Wybierz tryb gry")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("2-osobowy"):
-            select_mode_and_step_later("2-osobowy", "setup")
-    with col2:
-        if st.button("3-osobowy"):
-            select_mode_and_step_later("3-osobowy", "setup")
-    with col3:
-        if st.button("Drużynowy"):
-            select_mode_and_step_later("Drużynowy", "setup")
-    virtual_board_val = st.checkbox("🖥️ Użyj wirtualnej planszy")
-    st.session_state.virtual_board = virtual_board_val
-
-    if st.session_state.pending_mode is not None:
-        st.session_state.mode = st.session_state.pending_mode
-        st.session_state.step = st.session_state.pending_step
-        st.session_state.pending_mode = None
-        st.rerun()
+new_state("board_renderer", "png")
+count_script_run()
 
-#virtual_board_val = st.session_state.get("virtual_board", False)
-if st.session_state.mode == "2-osobowy":
-    run_2osobowy()
-elif st.session_state.mode == "3-osobowy":
-    run_3osobowy()
-elif st.session_state.mode == "Drużynowy":
-    run_druzynowy()
\ No newline at end of file
+with profiling.rerun(st.session_state.mode, st.session_state.step):
+    if st.session_state.step == "mode_select":
+        st.title("🎮 Wybierz tryb gry")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.button("2-osobowy", on_click=select_mode, args=("2-osobowy",))
+        with col2:
+            st.button("3-osobowy", on_click=select_mode, args=("3-osobowy",))
+        with col3:
+            st.button("Drużynowy", on_click=select_mode, args=("Drużynowy",))
+        virtual_board_val = st.checkbox("🖥️ Użyj wirtualnej planszy")
+        st.session_state.virtual_board = virtual_board_val
+        if virtual_board_val:
+            svg_board = st.checkbox("🪶 Lekka plansza (SVG)", value=st.session_state.board_renderer == "svg")
+            st.session_state.board_renderer = "svg" if svg_board else "png"
+        resume_screen()
+    elif st.session_state.step == "parked":
+        parked_screen()
+
+    #virtual_board_val = st.session_state.get("virtual_board", False)
+    if st.session_state.mode == "2-osobowy":
+        run_2osobowy()
+    elif st.session_state.mode == "3-osobowy":
+        run_3osobowy()
+    elif st.session_state.mode == "Drużynowy":
+        run_druzynowy()
+
+checkpoint_table(table_id)
+if table_id is not None:
+    idle_watch()
+
+if profiling.ENABLED and st.query_params.get("debug"):
+    debug_panel()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+import results_archive
+
+openpyxl = pytest.importorskip("openpyxl")
+
+BANK = {"Pierwsze pytanie?": "fun001", "Drugie „pytanie”?": "luz002"}
+
+# Starsze układy kolumn, po jednym na tryb (punkty gracza/drużyny w kolumnie z jego nazwą)
+LEGACY = {
+    "2025-08-10_gra001.xlsx": (
+        ("nr_pytania", "kategoria", "pytanie", "odpowiada", "zgaduje", "Ala", "Bartek"),
+        [(1, "Śmieszne", "  Pierwsze   pytanie? ", "Ala", "Bartek", 1, 3),
+         (2, "Luźne", "Pytanie spoza banku", "Bartek", "Ala", 2, 0)],
+    ),
+    "2025-08-10_gra002.xlsx": (
+        ("runda", "nr_pytania", "kategoria", "pytanie", "odpowiada", "zgaduje", "dodatkowo", "Ala", "Bartek", "tryb"),
+        [(1, 1, "Luźne", "Drugie \"pytanie\"?", "Ala", "Bartek", "tryb", 1, 3, 1)],
+    ),
+    "2025-08-11_gra001.xlsx": (
+        ("runda", "pytanie_nr", "kategoria", "pytanie", "odpowiada", "zgaduje_drużyna", "kierunek_drużyna",
+         "punkty_za_odpowiedź", "Niebiescy", "Czerwoni"),
+        [(1, 1, "Śmieszne", "pierwsze pytanie?", "Ala", "Niebiescy", "Czerwoni", 2, 4, 1)],
+    ),
+}
+
+
+def write_xlsx(path, header, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_archive, "question_ids",
+                        lambda: {results_archive.text_key(text): qid for text, qid in BANK.items()})
+    directory = tmp_path / "wyniki"
+    directory.mkdir()
+    for name, (header, rows) in LEGACY.items():
+        write_xlsx(directory / name, header, rows)
+    return directory
+
+
+def test_detect_layout_uses_fixed_columns():
+    # Gracz o imieniu "tryb" albo "dodatkowo" nie zmienia układu
+    assert results_archive.detect_layout(LEGACY["2025-08-10_gra001.xlsx"][0] + ("tryb",)) == "2-osobowy"
+    assert results_archive.detect_layout(LEGACY["2025-08-10_gra002.xlsx"][0]) == "3-osobowy"
+    assert results_archive.detect_layout(LEGACY["2025-08-11_gra001.xlsx"][0] + ("dodatkowo",)) == "Drużynowy"
+    assert results_archive.detect_layout(results_archive.COLUMNS) == "zdarzenia"
+    with pytest.raises(results_archive.ArchiveError):
+        results_archive.detect_layout(("pytanie", "odpowiada", "zgaduje"))
+
+
+def test_ingest_legacy_layouts(results_dir, tmp_path):
+    db_path = tmp_path / "wyniki.db"
+    stats = results_archive.ingest(str(results_dir), str(db_path), workers=1)
+    assert stats == {"files": 3, "parsed": 3, "removed": 0, "rows": 4, "errors": 0, "unmatched": 1}
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT file, tryb, id_pytania, odpowiada, zgaduje, kierunek, punkty_odpowiada, punkty_zgaduje, "
+        "punkty_kierunek FROM rounds ORDER BY file, nr_pytania"
+    ).fetchall()
+    layouts = dict(conn.execute("SELECT name, layout FROM files"))
+    conn.close()
+    assert layouts == {
+        "2025-08-10_gra001.xlsx": "2-osobowy",
+        "2025-08-10_gra002.xlsx": "3-osobowy",
+        "2025-08-11_gra001.xlsx": "Drużynowy",
+    }
+    assert rows == [
+        ("2025-08-10_gra001.xlsx", "2-osobowy", "fun001", "Ala", "Bartek", None, 1, 3, 0),
+        ("2025-08-10_gra001.xlsx", "2-osobowy", None, "Bartek", "Ala", None, 0, 2, 0),
+        ("2025-08-10_gra002.xlsx", "3-osobowy", "luz002", "Ala", "Bartek", "tryb", 1, 3, 1),
+        ("2025-08-11_gra001.xlsx", "Drużynowy", "fun001", "Ala", "Niebiescy", "Czerwoni", 2, 4, 1),
+    ]
+
+
+def test_ingest_is_incremental(results_dir, tmp_path):
+    db_path = str(tmp_path / "wyniki.db")
+    results_archive.ingest(str(results_dir), db_path, workers=1)
+    assert results_archive.ingest(str(results_dir), db_path, workers=1)["parsed"] == 0
+
+    (results_dir / "2025-08-10_gra002.xlsx").unlink()
+    stats = results_archive.ingest(str(results_dir), db_path, workers=1)
+    assert (stats["parsed"], stats["removed"]) == (0, 1)
@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import results_export
+from question_bank import CATEGORY_NAMES, QuestionBank
+from round_log import COLUMNS, RoundLog
+
+
+@pytest.fixture
+def log():
+    bank = QuestionBank([
+        {"id": f"q{i}", "text": f"Pytanie {i}", "category": CATEGORY_NAMES[i % 3], "left": "lewo", "right": "prawo"}
+        for i in range(6)
+    ], CATEGORY_NAMES)
+    log = RoundLog(bank, "3-osobowy")
+    for i in range(5):
+        log.append(1 + i // 3, 1 + i, bank.question(i), "Ala", "Bartek", 1, 3, "Celina", 1)
+    return log
+
+
+@pytest.mark.parametrize("fmt", list(results_export.FORMATS))
+def test_deferred_export_accepted_by_download_button(log, fmt):
+    # To samo, co robi st.download_button z wynikiem callable po kliknięciu "Pobierz"
+    data = results_export.deferred_export(log, fmt)()
+    as_bytes, _ = convert_data_to_bytes_and_infer_mime(data, RuntimeError("nieobsługiwany typ"))
+    assert as_bytes == results_export.export(log.events(), fmt)
+
+
+def test_csv_rows(log):
+    text = results_export.export(log.events(), "csv").decode("utf-8-sig")
+    rows = list(csv.reader(io.StringIO(text), delimiter=";"))
+    assert tuple(rows[0]) == COLUMNS
+    assert len(rows) == 1 + len(log)
+
+
+def test_jsonl_rows(log):
+    lines = results_export.export(log.events(), "jsonl").decode("utf-8").splitlines()
+    assert [json.loads(line)["id_pytania"] for line in lines] == [event.question_id for event in log.events()]
+
+
+def test_xlsx_readable(log):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.load_workbook(io.BytesIO(results_export.export(log.events(), "xlsx")), read_only=True)
+    rows = list(workbook.worksheets[0].iter_rows(values_only=True))
+    assert rows[0] == COLUMNS
+    assert len(rows) == 1 + len(log)
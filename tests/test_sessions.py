@@ -0,0 +1,49 @@
+import ast
+import os
+
+import pytest
+
+import sessions
+from question_bank import QuestionBank
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+RECORDS = [
+    {"id": "fun001", "text": "Pierwsze pytanie?", "category": "Śmieszne", "left": "nie", "right": "tak"},
+    {"id": "luz001", "text": "Drugie pytanie?", "category": "Luźne", "left": "zimno", "right": "gorąco"},
+]
+
+
+def app_transient_keys():
+    # Import aplikacji uruchomiłby skrypt Streamlit - stałą czytamy ze źródła
+    with open(APP, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "TRANSIENT_KEYS" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise AssertionError("brak TRANSIENT_KEYS w streamlit_app.py")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    bank = QuestionBank(RECORDS, ["Śmieszne", "Luźne"])
+    return sessions.Registry(bank, bank.digest(), app_transient_keys(), directory=str(tmp_path))
+
+
+def test_checkpoint_keeps_only_owner_hash(registry):
+    key = sessions.new_owner_key()
+    state = {
+        "step": "game", "table_id": "abc", "table_key": key, "table_lease": "lease",
+        "current_question": registry.bank.question(1),
+    }
+    registry.save("abc", "lease", sessions.owner_hash(key), state)
+
+    with open(registry.path("abc"), "rb") as f:
+        data = f.read()
+    assert key.encode() not in data
+    assert sessions.owner_hash(key).encode() in data
+
+    values = registry.restore("abc", key)
+    assert "table_key" not in values and "table_lease" not in values
+    assert values["current_question"] is registry.bank.question(1)
+    assert registry.restore("abc", sessions.new_owner_key()) is None